@@ -0,0 +1,142 @@
+# coding: utf-8
+
+# usage: python benchmarks/calls.py [--repeat N] [--engines tree,closure] [--against REV]
+#
+# runs call-heavy programs (every call returns a value, loops that leave
+# through break and continue) and reports the best wall time per engine.
+# with --against the same programs also run on the plox package as of the
+# given git revision, which is how the cost of unwinding control flow with
+# exceptions compares to completion values.
+
+import sys
+import tarfile
+import argparse
+import tempfile
+import subprocess
+
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROGRAMS = {
+    'fib': '''
+        fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+        print fib(22);
+    ''',
+    'returns': '''
+        fun id(x) { return x; }
+        fun add(a, b) { return id(a) + id(b); }
+
+        var total = 0;
+        for (var i = 0; i < 60000; i = i + 1) total = add(total, i);
+        print total;
+    ''',
+    'methods': '''
+        class Counter {
+            init() { this.n = 0; }
+            next() { this.n = this.n + 1; return this.n; }
+        }
+
+        var c = Counter();
+        var total = 0;
+        for (var i = 0; i < 40000; i = i + 1) total = total + c.next();
+        print total;
+    ''',
+    'loops': '''
+        fun find(limit) {
+            for (var i = 0; i < limit; i = i + 1) {
+                if (i < 5) continue;
+                if (i * i > limit) return i;
+            }
+        }
+
+        var total = 0;
+        for (var k = 0; k < 3000; k = k + 1) {
+            while (true) { total = total + find(k + 30); break; }
+        }
+        print total;
+    '''
+}
+
+# runs inside a fresh interpreter so that each revision imports its own plox
+WORKER = '''
+import io, sys, time, contextlib
+sys.path.insert(0, sys.argv[1])
+from plox.__main__ import PLox
+
+engine, repeat, source = sys.argv[2], int(sys.argv[3]), sys.stdin.read()
+timings = []
+
+for _ in range(repeat):
+    plox = PLox(engine)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        plox.run(source)
+        timings.append(time.perf_counter() - start)
+
+    if plox.error_occured or plox.runtime_error_occured:
+        print('error'); break
+else:
+    print(min(timings))
+'''
+
+def measure(root, engine, source, repeat):
+    result = subprocess.run(
+        [sys.executable, '-c', WORKER, str(root), engine, str(repeat)],
+        input=source, capture_output=True, text=True
+    )
+
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return None
+
+def checkout(revision, directory):
+    archive = subprocess.run(
+        ['git', '-C', str(ROOT), 'archive', '--format=tar', revision, 'plox'],
+        capture_output=True, check=True
+    )
+
+    archive_path = Path(directory) / 'plox.tar'
+    archive_path.write_bytes(archive.stdout)
+
+    with tarfile.open(archive_path) as tar:
+        tar.extractall(directory)
+
+    return Path(directory)
+
+def cell(elapsed, base=None):
+    if elapsed is None:
+        return f'{"error":>18}'
+
+    speedup = f' ({base / elapsed:4.1f}x)' if base else ''
+    return f'{elapsed:>10.4f}s{speedup:>7}'.rjust(18)
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('--repeat', type=int, default=3)
+    argparser.add_argument('--engines', default='tree,vm,closure')
+    argparser.add_argument('--against', metavar='REV')
+
+    args = argparser.parse_args()
+    engines = args.engines.split(',')
+
+    with tempfile.TemporaryDirectory() as directory:
+        roots = [('current', ROOT)]
+
+        if args.against:
+            roots.insert(0, (args.against, checkout(args.against, directory)))
+
+        print(f'{"program":<12}{"engine":<10}' + ''.join(f'{name:>18}' for name, _ in roots))
+
+        for program, source in PROGRAMS.items():
+            for engine in engines:
+                timings = [measure(root, engine, source, args.repeat) for _, root in roots]
+                base = timings[0] if len(timings) > 1 else None
+
+                cells = [cell(timings[0])] + [cell(elapsed, base) for elapsed in timings[1:]]
+                print(f'{program:<12}{engine:<10}' + ''.join(cells))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# coding: utf-8
+
+# usage: python benchmarks/engines.py [--repeat N] [--engines tree,closure] [file.lox ...]
+#
+# runs every program (examples/*.lox by default) on each engine with stdout
+# discarded and reports the best wall time along with the speedup over the
+# tree-walking interpreter.
+
+import io
+import sys
+import glob
+import time
+import argparse
+import contextlib
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from plox.__main__ import PLox, ENGINES
+
+def measure(engine, source, repeat):
+    timings = []
+
+    for _ in range(repeat):
+        plox = PLox(engine)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            sys.stdin = io.StringIO('2\n' * 16)
+
+            start = time.perf_counter()
+            plox.run(source)
+            timings.append(time.perf_counter() - start)
+
+        if plox.error_occured or plox.runtime_error_occured:
+            return None
+
+    return min(timings)
+
+def main():
+    root = Path(__file__).resolve().parent.parent
+
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('files', nargs='*')
+    argparser.add_argument('--repeat', type=int, default=3)
+    argparser.add_argument('--engines', default=','.join(ENGINES))
+
+    args = argparser.parse_args()
+    engines = args.engines.split(',')
+    files = args.files or sorted(glob.glob(str(root / 'examples' / '*.lox')))
+
+    print(f'{"program":<24}' + ''.join(f'{engine:>18}' for engine in engines))
+
+    for file_name in files:
+        source = Path(file_name).read_text()
+        row = {engine: measure(engine, source, args.repeat) for engine in engines}
+        base = row.get('tree')
+
+        cells = []
+
+        for engine in engines:
+            if (elapsed := row[engine]) is None:
+                cells.append(f'{"error":>18}'); continue
+
+            speedup = f' ({base / elapsed:4.1f}x)' if base and engine != 'tree' else ''
+            cells.append(f'{elapsed:>10.4f}s{speedup:>7}'.rjust(18))
+
+        print(f'{Path(file_name).name:<24}' + ''.join(cells))
+
+if __name__ == '__main__':
+    main()
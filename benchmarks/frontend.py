@@ -0,0 +1,53 @@
+# coding: utf-8
+
+# usage: python benchmarks/frontend.py [--lines N ...] [--repeat N]
+#
+# times the scanner and the parser on generated lox programs (the same
+# template benchmarks/memory.py uses) and reports throughput, so growing the
+# input shows whether the front end stays linear.
+
+import sys
+import time
+import argparse
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from plox.parser import Parser
+from plox.scanner import Scanner
+from plox.__main__ import PLox
+
+from memory import generate
+
+def best(fn, repeat):
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+
+    return result, min(timings)
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('--lines', type=int, nargs='+', default=[10000, 50000, 200000])
+    argparser.add_argument('--repeat', type=int, default=3)
+
+    args = argparser.parse_args()
+    plox = PLox()
+
+    print(f'{"lines":>8}{"bytes":>12}{"tokens":>10}{"scan":>10}{"parse":>10}{"MB/s":>8}')
+
+    for lines in args.lines:
+        source = generate(lines)
+
+        tokens, scan_time = best(lambda: Scanner(plox, source).scan_tokens(), args.repeat)
+        _, parse_time = best(lambda: Parser(plox, tokens).parse(), args.repeat)
+
+        throughput = len(source) / (scan_time + parse_time) / 1e6
+        print(f'{lines:>8}{len(source):>12}{len(tokens):>10}{scan_time:>9.3f}s{parse_time:>9.3f}s{throughput:>8.2f}')
+
+if __name__ == '__main__':
+    main()
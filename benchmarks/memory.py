@@ -0,0 +1,130 @@
+# coding: utf-8
+
+# usage: python benchmarks/memory.py [--lines N]
+#
+# scans and parses a generated lox program and reports how many bytes the
+# token list and the ast retain. the "__dict__" rows rebuild the very same
+# objects as plain instances with an attribute dict and one token object per
+# occurrence, which is how tokens and nodes were represented before they
+# were slotted, so both layouts are measured on identical input.
+
+import gc
+import sys
+import argparse
+import tracemalloc
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from plox.parser import Parser
+from plox.scanner import Scanner
+from plox.exprs import Expression
+from plox.stmts import Statement
+from plox.__main__ import PLox
+
+TEMPLATE = '''
+class Point{i} {{
+    init(x, y) {{ this.x = x; this.y = y; }}
+    add(other) {{ return Point{i}(this.x + other.x, this.y + other.y); }}
+}}
+
+fun work{i}(n) {{
+    var total = 0;
+
+    for (var k = 0; k < n; k = k + 1) {{
+        if (k > 2 and k != 5) total = total + k * 2; else total = total - 1;
+    }}
+
+    print "work{i}: " + total;
+    return Point{i}(total, -n).add(Point{i}(1, 2));
+}}
+'''
+
+class DictObject:
+    pass
+
+def generate(lines):
+    source, i = [], 0
+
+    while len(source) < lines:
+        source += TEMPLATE.format(i=i).splitlines()
+        i += 1
+
+    return '\n'.join(source)
+
+def retained(fn):
+    gc.collect()
+    tracemalloc.start()
+
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    gc.collect()
+    after  = tracemalloc.get_traced_memory()[0]
+
+    tracemalloc.stop()
+    return result, after - before
+
+def fields(node):
+    return (name for cls in type(node).__mro__ for name in getattr(cls, '__slots__', ()))
+
+def walk(node, seen):
+    if isinstance(node, list):
+        for item in node:
+            yield from walk(item, seen)
+
+    elif isinstance(node, (Expression, Statement)) and id(node) not in seen:
+        seen.add(id(node))
+        yield node
+
+        for name in fields(node):
+            yield from walk(getattr(node, name, None), seen)
+
+def dict_token(token):
+    clone = DictObject()
+    clone.line, clone.type = token.line, token.type
+    clone.lexeme, clone.literal = ''.join(list(token.lexeme)), token.literal
+
+    return clone
+
+def dict_node(node):
+    if isinstance(node, list):
+        return [dict_node(item) for item in node]
+
+    if not isinstance(node, (Expression, Statement)):
+        return node
+
+    clone = DictObject()
+
+    for name in fields(node):
+        setattr(clone, name, dict_node(getattr(node, name, None)))
+
+    return clone
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('--lines', type=int, default=20000)
+
+    args = argparser.parse_args()
+    plox = PLox()
+    source = generate(args.lines)
+
+    tokens, token_bytes = retained(lambda: Scanner(plox, source).scan_tokens())
+    statements, node_bytes = retained(lambda: Parser(plox, tokens).parse())
+
+    _, dict_token_bytes = retained(lambda: [dict_token(token) for token in tokens])
+    _, dict_node_bytes  = retained(lambda: dict_node(statements))
+
+    nodes = sum(1 for _ in walk(statements, set()))
+    distinct = len({id(token) for token in tokens})
+
+    print(f'source : {args.lines} lines, {len(source)} bytes')
+    print(f'tokens : {len(tokens)} ({distinct} distinct objects)')
+    print(f'    __dict__ : {dict_token_bytes / len(tokens):8.1f} bytes/token')
+    print(f'    current  : {token_bytes / len(tokens):8.1f} bytes/token')
+    print(f'nodes  : {nodes}')
+    print(f'    __dict__ : {dict_node_bytes / nodes:8.1f} bytes/node')
+    print(f'    current  : {node_bytes / nodes:8.1f} bytes/node')
+
+if __name__ == '__main__':
+    main()
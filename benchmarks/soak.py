@@ -0,0 +1,90 @@
+# coding: utf-8
+
+# usage: python benchmarks/soak.py [-n 100000] [--engine E] [--limit MB]
+#
+# runs a small program n times on one PLox, the way a long-lived session or
+# the repl does, and checks that memory stays flat: the resident set size is
+# taken once a tenth of the runs have warmed things up and again at the end,
+# the script exits with 1 if it grew by more than --limit megabytes.
+
+import gc
+import os
+import sys
+import time
+import resource
+import argparse
+import contextlib
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from plox.__main__ import PLox, ENGINES
+
+SOURCE = '''
+class Point {
+    init(x, y) { this.x = x; this.y = y; }
+    add(other) { return Point(this.x + other.x, this.y + other.y); }
+}
+
+fun counter() {
+    var n = 0;
+    fun next() { n = n + 1; return n; }
+    return next;
+}
+
+var next = counter();
+var p = Point(0, 0);
+
+for (var i = 0; i < 10; i = i + 1) {
+    p = p.add(Point(i, next()));
+}
+
+print p.x + p.y;
+'''
+
+def rss():
+    # /proc has the current size, elsewhere only the peak is known
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('-n', type=int, default=100000)
+    argparser.add_argument('--engine', choices=ENGINES, default='tree')
+    argparser.add_argument('--limit', type=float, default=4, metavar='MB')
+
+    args = argparser.parse_args()
+    plox = PLox(args.engine)
+    step = max(1, args.n // 10)
+    start = time.perf_counter()
+    baseline = None
+
+    print(f'{"runs":>8}{"rss":>12}')
+
+    with open(os.devnull, 'w') as devnull:
+        for i in range(1, args.n + 1):
+            with contextlib.redirect_stdout(devnull):
+                plox.run(SOURCE)
+
+            if plox.error_occured or plox.runtime_error_occured:
+                sys.exit('soak: the program failed')
+
+            if i % step == 0 or i == args.n:
+                gc.collect()
+                size = rss()
+                baseline = baseline or size
+
+                print(f'{i:>8}{size / 1e6:>10.1f}MB')
+
+    growth = (size - baseline) / 1e6
+    print(f'{args.n} runs in {time.perf_counter() - start:.1f}s, rss grew {growth:.1f}MB after warm-up')
+
+    if growth > args.limit:
+        sys.exit(f'soak: rss grew by more than {args.limit:g}MB')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# coding: utf-8
+
+# usage: python benchmarks/strings.py [--mb N] [--plus-mb N] [--engines tree,vm,closure]
+#
+# builds a string of N megabytes out of 100 character lines three ways: with
+# s = s + line, with the same loop under --ropes and with a StringBuilder.
+# the plain loop copies everything built so far on every line and grows
+# quadratically, it only builds --plus-mb (1 by default) so the run ends.
+
+import io
+import sys
+import time
+import argparse
+import contextlib
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from plox.__main__ import PLox
+
+LINE = 'x' * 100
+
+PLUS = '''
+    var line = "%s";
+    var s = "";
+    for (var i = 0; i < %d; i = i + 1) s = s + line;
+    print s;
+'''
+
+BUILDER = '''
+    var line = "%s";
+    var sb = StringBuilder();
+    for (var i = 0; i < %d; i = i + 1) sb.append(line);
+    print sb.toString();
+'''
+
+def measure(engine, source, ropes):
+    plox = PLox(engine, ropes=ropes)
+    output = io.StringIO()
+
+    with contextlib.redirect_stdout(output):
+        start = time.perf_counter()
+        plox.run(source)
+        elapsed = time.perf_counter() - start
+
+    return elapsed, len(output.getvalue())
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('--mb', type=float, default=10)
+    argparser.add_argument('--plus-mb', type=float, default=1)
+    argparser.add_argument('--engines', default='tree,vm,closure')
+
+    args = argparser.parse_args()
+
+    lines = int(args.mb * 1e6 / len(LINE))
+    plus_lines = int(args.plus_mb * 1e6 / len(LINE))
+
+    variants = [
+        (f's = s + line ({args.plus_mb:g} MB)', PLUS % (LINE, plus_lines), False),
+        (f's = s + line --ropes ({args.mb:g} MB)', PLUS % (LINE, lines), True),
+        (f'StringBuilder ({args.mb:g} MB)', BUILDER % (LINE, lines), False)
+    ]
+
+    print(f'{"variant":<32}{"engine":<10}{"time":>10}{"MB/s":>10}')
+
+    for name, source, ropes in variants:
+        for engine in args.engines.split(','):
+            elapsed, size = measure(engine, source, ropes)
+            print(f'{name:<32}{engine:<10}{elapsed:>9.3f}s{size / elapsed / 1e6:>10.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+# coding: utf-8
+
+__version__ = '0.1.0'
+
+# the embedding api (plox.compile, Program.run) builds on PLox, which lives
+# in plox.__main__. it is imported on first use so that "python -m plox"
+# does not import __main__ a second time as a plain module.
+
+def __getattr__(name):
+    if name in ('compile', 'Program', 'Result', 'Error'):
+        from plox import embed
+        return getattr(embed, name)
+
+    raise AttributeError(f'module "plox" has no attribute "{name}"')
\ No newline at end of file
@@ -1,12 +1,21 @@
 # coding: utf-8
 
 import sys
+import ctypes
+import argparse
 import readline
+import functools
+import threading
 
 from plox.parser import Parser
 from plox.scanner import Scanner
+from plox.cache import ProgramCache
 from plox.resolver import Resolver
+from plox.optimizer import Optimizer
 from plox.interpreter import Interpreter
+from plox.vm import VM
+from plox.closures import ClosureInterpreter
+from plox.profiler import ProfilingInterpreter, SamplingInterpreter
 
 from plox.native import init_functions
 
@@ -24,20 +33,162 @@ def get_input():
 
     return source
 
+ENGINES = {
+    'tree'   : Interpreter,
+    'vm'     : VM,
+    'closure': ClosureInterpreter
+}
+
+# lox calls nest python frames in the tree-walking and closure engines (7 to
+# 11 for a plain call, more within nested expressions), the recursion limit
+# is raised so that max_depth lox calls fit. python frames do not take c
+# stack but the same limit guards c recursion that does (str of a deeply
+# nested list, pickling a deep ast), so programs run on a thread with a
+# stack sized for the raised limit and the limit is put back once no
+# program is running.
+FRAMES_PER_CALL = 32
+STACK_PER_FRAME = 1024
+
+class EngineThread(threading.Thread):
+    lock = threading.Lock()
+    running = 0
+    limit = None
+
+    def __init__(self, recursion_limit, function, args):
+        super().__init__(name='plox', daemon=True)
+        self.recursion_limit = recursion_limit
+        self.function = function
+        self.args = args
+        self.result = self.error = None
+        self.done = threading.Event()
+
+    def run(self):
+        try:
+            self.result = self.function(*self.args)
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.done.set()
+
+    def start(self):
+        cls = EngineThread
+
+        with cls.lock:
+            if cls.running == 0:
+                cls.limit = sys.getrecursionlimit()
+
+            cls.running += 1
+            sys.setrecursionlimit(max(sys.getrecursionlimit(), self.recursion_limit))
+            size = threading.stack_size(self.recursion_limit * STACK_PER_FRAME)
+
+            try:
+                super().start()
+            finally:
+                threading.stack_size(size)
+
+    def wait(self):
+        try:
+            # not join, an interrupted join takes the thread for finished
+            while not self.done.is_set():
+                try:
+                    self.done.wait()
+                except KeyboardInterrupt:
+                    # ctrl-c reaches the main thread, it is passed on
+                    ctypes.pythonapi.PyThreadState_SetAsyncExc(
+                        ctypes.c_ulong(self.ident), ctypes.py_object(KeyboardInterrupt))
+        finally:
+            cls = EngineThread
+
+            with cls.lock:
+                cls.running -= 1
+
+                if cls.running == 0:
+                    sys.setrecursionlimit(cls.limit)
+
+        if self.error is not None:
+            raise self.error
+
+        return self.result
+
+def run_deep(max_depth, function, *args):
+    if isinstance(threading.current_thread(), EngineThread):
+        return function(*args)
+
+    thread = EngineThread(max_depth * FRAMES_PER_CALL, function, args)
+    thread.start()
+
+    return thread.wait()
+
+def deep(method):
+    @functools.wraps(method)
+    def run(self, *args):
+        return run_deep(self.max_depth, method, self, *args)
+
+    return run
+
 class PLox:
-    def __init__(self):
-        self.interpreter = init_functions(Interpreter(self))
+    def __init__(self, engine='tree', optimize=True, max_depth=10000, cache=False, profile=None,
+                 sample=None, sample_interval=0.001, ropes=False, workers=None):
+        self.engines = {}
+        self.pools = {}
+        self.cache = cache
+        self.ropes = ropes
+        self.workers = workers
+        self.profile = profile
+        self.sample = sample
+        self.sample_interval = sample_interval
+        self.optimize = optimize
+        self.max_depth = max_depth
+
+        self.interpreter = self.get_interpreter(engine)
         self.error_occured = False
         self.runtime_error_occured = False
 
-    def run(self, source):
-        token_list = Scanner(self, source).scan_tokens()
-        statements = Parser(self, token_list).parse()
+    def get_interpreter(self, engine):
+        if engine not in self.engines:
+            # profiling is a separate engine class, the plain one pays nothing for it
+            engine_class = ENGINES[engine]
+
+            if engine == 'tree' and self.profile:
+                engine_class = ProfilingInterpreter
+            elif engine == 'tree' and self.sample:
+                engine_class = SamplingInterpreter
+
+            self.engines[engine] = init_functions(engine_class(self))
+
+        return self.engines[engine]
+
+    @deep
+    def run(self, source, engine=None):
+        interpreter = self.get_interpreter(engine) if engine else self.interpreter
+        statements = self.compile(source)
+
+        if not self.error_occured:
+            interpreter.interpret(statements)
+
+    @deep
+    def compile(self, source):
+        statements = Parser(self, Scanner(self, source).scan()).parse()
 
         if not self.error_occured:
-            resolver = Resolver(self, self.interpreter)
+            resolver = Resolver(self)
             resolver.resolve(*statements)
 
+        if not self.error_occured and self.optimize:
+            statements = Optimizer().optimize(statements)
+
+        return statements
+
+    @deep
+    def run_cached(self, source, cache):
+        key = cache.key(source, self.optimize, self.ropes)
+
+        if (statements := cache.load(key)) is None:
+            statements = self.compile(source)
+
+            if not self.error_occured:
+                cache.store(key, statements)
+
         if not self.error_occured:
             self.interpreter.interpret(statements)
 
@@ -52,7 +203,29 @@ class PLox:
 
     def run_file(self, file_name):
         with open(file_name, 'r') as f:
-            self.run(f.read())
+            source = f.read()
+
+        try:
+            if not self.cache:
+                self.run(source)
+            else:
+                cache = ProgramCache.for_file(file_name)
+                self.run_cached(source, cache)
+
+                if self.cache == 'stats':
+                    print(f'cache: {cache.hits} hits, {cache.misses} misses ({cache.directory})', file=sys.stderr)
+        finally:
+            self.shutdown()
+
+        if self.profile:
+            self.interpreter.profile.report()
+
+            if self.profile is not True:
+                self.interpreter.profile.dump(self.profile)
+
+        if self.sample:
+            samples = self.interpreter.sampler.write(self.sample)
+            print(f'sample: {samples} samples written to {self.sample}', file=sys.stderr)
 
         if self.error_occured:
             sys.exit(65)
@@ -60,6 +233,14 @@ class PLox:
         if self.runtime_error_occured:
             sys.exit(70)
 
+    def shutdown(self):
+        # a process running scripts one after another (batch) would
+        # otherwise keep the workers of every parallel_map pool it made
+        for pool in self.pools.values():
+            pool.shutdown()
+
+        self.pools.clear()
+
     def scan_error(self, line, message):
         self.report(line, '\b', message)
         self.error_occured = True
@@ -77,11 +258,40 @@ class PLox:
         self.report(error.token.line, '\b', f'"{error.token.lexeme}" {error.message}')
         self.runtime_error_occured = True
 
-    def report(self, line, where, message, ofile=sys.stderr):
-        print(f'line {line}: {where} {message}', file=ofile)
+    def report(self, line, where, message, ofile=None):
+        print(f'line {line}: {where} {message}', file=ofile or sys.stderr)
 
 if __name__ == '__main__':
-    if len(sys.argv) == 1:
-        PLox().run_prompt()
+    if sys.argv[1:2] == ['batch']:
+        from plox.batch import main
+        sys.exit(main(sys.argv[2:]))
+
+    argparser = argparse.ArgumentParser(prog='plox')
+    argparser.add_argument('file', nargs='?')
+    argparser.add_argument('--engine', choices=ENGINES, default='tree')
+    argparser.add_argument('--O0', dest='optimize', action='store_false', help='disable the ast optimizer')
+    argparser.add_argument('--max-depth', type=int, default=10000, help='lox call depth limit')
+    argparser.add_argument('--no-cache', dest='cache', action='store_false', help='do not use __loxcache__')
+    argparser.add_argument('--cache-stats', action='store_true', help='report cache hits and misses')
+    argparser.add_argument('--profile', action='store_true', help='report time per function and hits per line')
+    argparser.add_argument('--profile-json', metavar='FILE', help='also save the profile as json')
+    argparser.add_argument('--sample', metavar='FILE', help='write sampled lox stacks in collapsed format')
+    argparser.add_argument('--sample-interval', type=float, default=1.0, metavar='MS', help='time between samples')
+    argparser.add_argument('--ropes', action='store_true', help='build long strings from "+" lazily')
+    argparser.add_argument('--workers', type=int, help='processes parallel_map runs on (all cpus)')
+
+    args = argparser.parse_args()
+    cache = args.cache and ('stats' if args.cache_stats else True)
+    profile = args.profile_json or args.profile
+
+    if (profile or args.sample) and args.engine != 'tree':
+        argparser.error('--profile and --sample need the tree engine')
+
+    if profile and args.sample:
+        argparser.error('--profile and --sample can not be combined')
+
+    if args.file is None:
+        PLox(args.engine, args.optimize, args.max_depth, ropes=args.ropes, workers=args.workers).run_prompt()
 
-    PLox().run_file(sys.argv[1])
\ No newline at end of file
+    PLox(args.engine, args.optimize, args.max_depth, cache, profile,
+         args.sample, args.sample_interval / 1000, args.ropes, args.workers).run_file(args.file)
\ No newline at end of file
@@ -0,0 +1,91 @@
+# coding: utf-8
+
+# usage: python -m plox batch [-j N] [--engine E] [--no-cache] [--json OUT] paths ...
+#
+# runs every .lox file given (directories are searched recursively) on a
+# pool of worker processes that import plox once and then take one script
+# after another, each on a fresh PLox. the output of a script is captured
+# separately and its exit status is the one run_file would give (65 for a
+# compile error, 70 for a runtime error). a line per script is printed in
+# the order the paths were given, --json writes everything to a report.
+
+import io
+import os
+import json
+import time
+import argparse
+import traceback
+import contextlib
+
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from plox.__main__ import PLox, ENGINES
+
+def find_scripts(paths):
+    scripts = []
+
+    for path in map(Path, paths):
+        scripts += sorted(path.rglob('*.lox')) if path.is_dir() else [path]
+
+    return scripts
+
+def run_script(path, engine, cache):
+    stdout, stderr = io.StringIO(), io.StringIO()
+    start = time.perf_counter()
+
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            PLox(engine, cache=cache).run_file(path)
+            status = 0
+
+        except SystemExit as exit:
+            status = exit.code if isinstance(exit.code, int) else 1
+
+        except BaseException:
+            traceback.print_exc()
+            status = 1
+
+    return {
+        'path': str(path),
+        'status': status,
+        'time': time.perf_counter() - start,
+        'stdout': stdout.getvalue(),
+        'stderr': stderr.getvalue()
+    }
+
+def main(argv):
+    argparser = argparse.ArgumentParser(prog='plox batch')
+    argparser.add_argument('paths', nargs='+', metavar='path')
+    argparser.add_argument('-j', '--jobs', type=int, default=os.cpu_count())
+    argparser.add_argument('--engine', choices=ENGINES, default='tree')
+    argparser.add_argument('--no-cache', dest='cache', action='store_false', help='do not use __loxcache__')
+    argparser.add_argument('--json', metavar='OUT', help='write a report with the output of every script')
+
+    args = argparser.parse_args(argv)
+    scripts = find_scripts(args.paths)
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(args.jobs) as pool:
+        results = []
+
+        for result in pool.map(run_script, scripts, [args.engine] * len(scripts), [args.cache] * len(scripts)):
+            print(f'{result["status"]:>3}  {result["time"]:>8.3f}s  {result["path"]}')
+            results.append(result)
+
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for result in results if result['status'] != 0)
+
+    print(f'{len(results)} scripts, {failed} failed in {elapsed:.3f}s')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'engine': args.engine,
+                'jobs': args.jobs,
+                'time': elapsed,
+                'failed': failed,
+                'scripts': results
+            }, f, indent=2)
+
+    return 1 if failed else 0
@@ -0,0 +1,116 @@
+# coding: utf-8
+
+# usage: python -m plox.bench [names ...] [-n N] [--engine E] [--json OUT]
+#                             [--baseline FILE] [--threshold F]
+#
+# runs the .lox programs in benchmarks/ (the classic lox benchmark set) with
+# the interpreter of this checkout and reports the median and the standard
+# deviation of N timed runs. --json saves the results, and a file saved that
+# way can be passed as --baseline to a later run: benchmarks whose median got
+# slower by more than the threshold are flagged and the exit status is 1.
+
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import contextlib
+
+from pathlib import Path
+
+from plox import __version__
+from plox.__main__ import PLox, ENGINES
+
+SUITE = Path(__file__).resolve().parent.parent / 'benchmarks'
+
+def measure(source, engine, iterations):
+    timings = []
+
+    for _ in range(iterations):
+        # a fresh instance per run, nothing leaks in from the previous one
+        plox = PLox(engine)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            plox.run(source)
+            timings.append(time.perf_counter() - start)
+
+        if plox.error_occured or plox.runtime_error_occured:
+            return None
+
+    return timings
+
+def compare(median, baseline, threshold):
+    if baseline is None:
+        return ''
+
+    ratio = median / baseline
+
+    if ratio > 1 + threshold:
+        return f'{ratio:6.2f}x  REGRESSION'
+
+    return f'{ratio:6.2f}x' + ('  faster' if ratio < 1 - threshold else '')
+
+def main():
+    argparser = argparse.ArgumentParser(prog='python -m plox.bench')
+    argparser.add_argument('names', nargs='*', metavar='name')
+    argparser.add_argument('-n', '--iterations', type=int, default=5)
+    argparser.add_argument('--engine', choices=ENGINES, default='tree')
+    argparser.add_argument('--json', metavar='OUT')
+    argparser.add_argument('--baseline', metavar='FILE')
+    argparser.add_argument('--threshold', type=float, default=0.1)
+
+    args = argparser.parse_args()
+    files = sorted(SUITE.glob('*.lox'))
+
+    if args.names:
+        files = [file for file in files if file.stem in args.names]
+
+    baseline = {}
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['benchmarks']
+
+    results = {}
+    regressions = []
+
+    print(f'{"benchmark":<18}{"median":>10}{"stdev":>10}{"baseline":>10}')
+
+    for file in files:
+        timings = measure(file.read_text(), args.engine, args.iterations)
+
+        if timings is None:
+            print(f'{file.stem:<18}{"error":>10}'); continue
+
+        median = statistics.median(timings)
+        stdev = statistics.stdev(timings) if len(timings) > 1 else 0.0
+        base = baseline.get(file.stem, {}).get('median')
+
+        results[file.stem] = {'median': median, 'stdev': stdev, 'runs': timings}
+        verdict = compare(median, base, args.threshold)
+
+        if verdict.endswith('REGRESSION'):
+            regressions.append(file.stem)
+
+        base = f'{base:>9.4f}s' if base else f'{"-":>10}'
+        print(f'{file.stem:<18}{median:>9.4f}s{stdev:>9.4f}s{base}  {verdict}'.rstrip())
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'engine': args.engine,
+                'plox': __version__,
+                'python': platform.python_version(),
+                'iterations': args.iterations,
+                'benchmarks': results
+            }, f, indent=2)
+
+    if regressions:
+        print(f'regressed: {", ".join(regressions)}', file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
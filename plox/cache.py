@@ -0,0 +1,127 @@
+# coding: utf-8
+
+import gc
+import os
+import pickle
+import hashlib
+import tempfile
+
+from pathlib import Path
+
+from plox import __version__
+
+FORMAT = 2
+HEADER = b'LOXC' + bytes([FORMAT]) + __version__.encode() + b'\0'
+
+DEFAULT_LIMIT = 64 * 1024 * 1024
+
+# a cached program is the ast as it leaves the resolver (and the optimizer),
+# every local access carries its resolved (depth, slot) with it. entries
+# are named after a hash of the source, the plox version and the optimize
+# and ropes flags and start with a header that is checked again on load. the
+# least recently used entries are dropped once the directory outgrows the
+# limit, a program whose entry alone would outgrow it is not cached.
+#
+# PLOX_CACHE_DIR overrides the default __loxcache__ next to the script and
+# PLOX_CACHE_SIZE sets the limit in bytes.
+
+class ProgramCache:
+    def __init__(self, directory, limit=DEFAULT_LIMIT):
+        self.directory = Path(directory)
+        self.limit = limit
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def for_file(cls, file_name):
+        directory = os.environ.get('PLOX_CACHE_DIR') or Path(file_name).resolve().parent / '__loxcache__'
+        return cls(directory, int(os.environ.get('PLOX_CACHE_SIZE', DEFAULT_LIMIT)))
+
+    def key(self, source, optimize, ropes=False):
+        digest = hashlib.sha256(f'{__version__}:{int(optimize)}:{int(ropes)}:'.encode())
+        digest.update(source.encode())
+
+        return digest.hexdigest()
+
+    def path(self, key):
+        return self.directory / f'{key}.loxc'
+
+    def load(self, key):
+        path = self.path(key)
+
+        # unpickling allocates the whole tree at once, the collector would
+        # walk it over and over while nothing can be garbage yet
+        collecting = gc.isenabled()
+        gc.disable()
+
+        try:
+            with open(path, 'rb') as f:
+                program = pickle.load(f) if f.read(len(HEADER)) == HEADER else None
+
+        except (OSError, EOFError, AttributeError, ImportError, pickle.UnpicklingError):
+            program = None
+
+        finally:
+            if collecting: gc.enable()
+
+        if program is None:
+            self.misses += 1; return None
+
+        try:
+            os.utime(path) # the mtime orders entries for eviction
+        except OSError:
+            pass
+
+        self.hits += 1
+        return program
+
+    def store(self, key, program):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+            # written aside and renamed, concurrent runs never see half an entry
+            with tempfile.NamedTemporaryFile('wb', dir=self.directory, suffix='.tmp', delete=False) as f:
+                try:
+                    f.write(HEADER)
+                    pickle.dump(program, f, pickle.HIGHEST_PROTOCOL)
+                except BaseException:
+                    f.close(); os.remove(f.name); raise
+
+            # an entry bigger than the whole cache would only evict the rest
+            if (size := os.path.getsize(f.name)) > self.limit:
+                os.remove(f.name); return
+
+            os.replace(f.name, self.path(key))
+
+        except (OSError, RecursionError, pickle.PicklingError):
+            return
+
+        self.evict(self.path(key), size)
+
+    def evict(self, keep, kept):
+        entries = []
+
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                # the entry just written is the most recently used, even
+                # where mtimes are too coarse to tell it from the others
+                if entry.name.endswith('.loxc') and entry.path != str(keep):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries) + kept
+
+        for _, size, path in sorted(entries):
+            if total <= self.limit:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+            total -= size
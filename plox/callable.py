@@ -1,7 +1,7 @@
 # coding: utf-8
 
 from plox.error import RuntimeError
-from plox.error import ReturnException
+from plox.types import Completion
 from plox.environment import Environment
 
 class LoxCallable:
@@ -12,8 +12,9 @@ class LoxCallable:
         pass
 
 class LoxFunction(LoxCallable):
-    def __init__(self, declaration, closure, initializer=False):
+    def __init__(self, declaration, closure, initializer=False, receiver=None):
         self.closure = closure
+        self.receiver = receiver
         self.declaration = declaration
         self.initializer = initializer
 
@@ -27,25 +28,37 @@ class LoxFunction(LoxCallable):
         return len(self.declaration.params)
 
     def bind(self, instance):
-        environment = Environment(self.closure)
-        environment.define('this', instance)
+        return self.__class__(self.declaration, self.closure, self.initializer, instance)
 
-        return LoxFunction(self.declaration, environment, self.initializer)
+    def frame(self, receiver, arguments):
+        # a method keeps its receiver ("this") in slot 0, parameters follow it
+        environment = Environment(self.closure, self.declaration.scope_size)
+
+        if receiver is None:
+            environment.values[:len(arguments)] = arguments
+        else:
+            environment.values[0] = receiver
+            environment.values[1:len(arguments) + 1] = arguments
+
+        return environment
 
     def call(self, interpreter, arguments):
-        environment = Environment(self.closure)
+        return self.invoke(interpreter, self.receiver, arguments)
 
-        for (param, val) in zip(self.declaration.params, arguments):
-            environment.define(param.lexeme, val)
+    def invoke(self, interpreter, receiver, arguments):
+        function = self
 
-        try:
-            interpreter.execute_block(self.declaration.body.statements, environment)
-        except ReturnException as ret:
-            if not self.initializer:
-                return ret.value
+        # a call in return position completes with TAIL and leaves its target
+        # in interpreter.tail, it runs in this loop instead of nesting a call
+        while (completion := interpreter.execute_block(
+                function.declaration.body.statements, function.frame(receiver, arguments))) is Completion.TAIL:
+            function, receiver, arguments = interpreter.tail
 
-        if self.initializer:
-            return self.closure.get_at(0, 'this')
+        if function.initializer:
+            return receiver
+
+        if completion is Completion.RETURN:
+            return interpreter.returned
 
 class LoxInstance:
     def __init__(self, lclass):
@@ -62,7 +75,7 @@ class LoxInstance:
         if name.lexeme in self.fields:
             return self.fields[name.lexeme]
 
-        if (method := self.lclass.find_method(name.lexeme)):
+        if (method := self.lclass.methods.get(name.lexeme)):
             return method.bind(self)
 
         raise RuntimeError(name, f'undefined property {name.lexeme}')
@@ -70,29 +83,27 @@ class LoxInstance:
 class LoxClass(LoxCallable):
     def __init__(self, name, methods, superclass):
         self.name = name
-        self.methods = methods
         self.superclass = superclass
 
+        # inherited methods are copied in once, so a lookup never walks the superclass chain
+        self.methods = {**superclass.methods, **methods} if superclass else methods
+
+        self.initializer = self.methods.get('init')
+        self.init_arity = self.initializer.arity() if self.initializer else 0
+
     def __str__(self):
         return f'<class "{self.name}">'
 
     def find_method(self, name):
-        if name in self.methods:
-            return self.methods[name]
-
-        if self.superclass:
-            return self.superclass.find_method(name)
+        return self.methods.get(name)
 
     def arity(self):
-        if (initializer := self.find_method('init')):
-            return initializer.arity()
-
-        return 0
+        return self.init_arity
 
     def call(self, interpreter, arguments):
         instance = LoxInstance(self)
 
-        if (initializer := self.find_method('init')):
-            initializer.bind(instance).call(interpreter, arguments)
+        if self.initializer:
+            self.initializer.invoke(interpreter, instance, arguments)
 
         return instance
\ No newline at end of file
@@ -0,0 +1,499 @@
+# coding: utf-8
+
+import operator
+
+from plox.exprs import Call, Invoke
+from plox.types import TokenType, Completion
+from plox.environment import Environment, GlobalEnvironment
+from plox.interpreter import stringify
+from plox.operators import NUMBERS, check_number_operands
+from plox.rope import concat
+
+from plox.error import RuntimeError
+
+from plox.callable import (
+    LoxClass,
+    LoxInstance,
+    LoxCallable,
+    LoxFunction
+)
+
+BREAK, CONTINUE, RETURN, TAIL = Completion
+
+NUMERIC_OPS = {
+    TokenType.LESS         : operator.lt,
+    TokenType.GREATER      : operator.gt,
+    TokenType.STAR         : operator.mul,
+    TokenType.SLASH        : operator.truediv,
+    TokenType.MINUS        : operator.sub,
+    TokenType.LESS_EQUAL   : operator.le,
+    TokenType.GREATER_EQUAL: operator.ge
+}
+
+class ClosureFunction(LoxFunction):
+    def invoke(self, interpreter, receiver, arguments):
+        function = self
+
+        while True:
+            # a body is bound to the engine that compiled it (its globals,
+            # its return state), any other engine compiles its own
+            if (compiled := function.declaration.compiled) is not None and compiled[0] is interpreter:
+                body = compiled[1]
+            else:
+                body = interpreter.compile_function(function.declaration)
+
+            if (completion := body(function.frame(receiver, arguments))) is not TAIL:
+                break
+
+            function, receiver, arguments = interpreter.tail
+
+        if function.initializer:
+            return receiver
+
+        if completion is RETURN:
+            return interpreter.returned
+
+class ClosureInterpreter:
+    def __init__(self, plox):
+        self.plox = plox
+        self.globals = GlobalEnvironment()
+        self.returned = None
+        self.tail = None
+        self.depth = 0
+        self.stdout = None
+
+    def interpret(self, statements):
+        program = self.compile_sequence(statements)
+        self.depth = 0
+
+        try:
+            program(self.globals)
+        except RuntimeError as error:
+            self.plox.runtime_error(error)
+
+    def wait(self, request):
+        return request.block()
+
+    def compile(self, node):
+        return node.accept(self)
+
+    # compiled statements return None, or a Completion when they cut the
+    # enclosing blocks short, like the tree-walking interpreter does
+
+    def compile_sequence(self, statements):
+        body = tuple(self.compile(stmt) for stmt in statements if stmt)
+
+        if len(body) == 1:
+            return body[0]
+
+        def sequence(env):
+            for stmt in body:
+                if (completion := stmt(env)) is not None:
+                    return completion
+
+        return sequence
+
+    def compile_function(self, stmt):
+        body = self.compile_sequence(stmt.body.statements)
+        stmt.compiled = (self, body)
+
+        return body
+
+    def compile_lookup(self, expr, name):
+        if (local := expr.local) is None:
+            get = self.globals.get
+            return lambda env: get(name)
+
+        distance, slot = local
+
+        if distance == 0:
+            return lambda env: env.values[slot]
+
+        if distance == 1:
+            return lambda env: env.enclosing.values[slot]
+
+        return lambda env: env.ancestor(distance).values[slot]
+
+    def declaration_key(self, stmt):
+        if (local := stmt.local) is not None:
+            return local[1]
+
+        return stmt.name.lexeme
+
+    def visit_literal(self, expr):
+        value = expr.value
+        return lambda env: value
+
+    def visit_grouping(self, expr):
+        return self.compile(expr.expression)
+
+    def visit_this(self, expr):
+        return self.compile_lookup(expr, expr.token)
+
+    def visit_variable(self, expr):
+        return self.compile_lookup(expr, expr.name)
+
+    def visit_unary(self, expr):
+        right = self.compile(expr.expression)
+        token = expr.operator
+
+        if token.type == TokenType.BANG:
+            return lambda env: not right(env)
+
+        def negate(env):
+            value = right(env)
+
+            if value.__class__ not in NUMBERS:
+                check_number_operands(token, value)
+
+            return -1 * value
+
+        return negate
+
+    def visit_assignment(self, expr):
+        value = self.compile(expr.value)
+        name = expr.name
+
+        if (local := expr.local) is None:
+            assign = self.globals.assign
+
+            def assign_global(env):
+                result = value(env)
+                assign(name, result)
+                return result
+
+            return assign_global
+
+        distance, slot = local
+
+        def assign_local(env):
+            result = env.ancestor(distance).values[slot] = value(env)
+            return result
+
+        return assign_local
+
+    def visit_logical(self, expr):
+        left  = self.compile(expr.left)
+        right = self.compile(expr.right)
+
+        if expr.operator.type == TokenType.OR:
+            return lambda env: left(env) or right(env)
+
+        return lambda env: left(env) and right(env)
+
+    def visit_get(self, expr):
+        object = self.compile(expr.object)
+        name = expr.name
+
+        def get(env):
+            instance = object(env)
+
+            if isinstance(instance, LoxInstance):
+                return instance.get(name)
+
+            raise RuntimeError(name, 'only instances have properties')
+
+        return get
+
+    def visit_set(self, expr):
+        object = self.compile(expr.object)
+        value  = self.compile(expr.value)
+        name   = expr.name
+
+        def set(env):
+            instance = object(env)
+
+            if not isinstance(instance, LoxInstance):
+                raise RuntimeError(name, 'only instances have fields')
+
+            result = value(env)
+            instance.set(name, result)
+
+            return result
+
+        return set
+
+    def visit_super(self, expr):
+        distance, _ = expr.local
+        method = expr.method
+
+        def super(env):
+            superclass = env.get_at(distance, 0)
+            object     = env.get_at(distance - 1, 0)
+
+            if not (function := superclass.find_method(method.lexeme)):
+                raise RuntimeError(method, f'undefined method "{method.lexeme}"')
+
+            return function.bind(object)
+
+        return super
+
+    def visit_call(self, expr):
+        callee = self.compile(expr.callee)
+        arguments = tuple(self.compile(arg) for arg in expr.arguments)
+        paren = expr.paren
+
+        def call(env):
+            return self.call(paren, callee(env), None, [arg(env) for arg in arguments])
+
+        return call
+
+    def visit_invoke(self, expr):
+        method = self.compile_method(expr)
+        arguments = tuple(self.compile(arg) for arg in expr.arguments)
+        paren = expr.paren
+
+        def invoke(env):
+            function, receiver = method(env)
+            return self.call(paren, function, receiver, [arg(env) for arg in arguments])
+
+        return invoke
+
+    def compile_method(self, expr):
+        object = self.compile(expr.object)
+        name = expr.name
+        lexeme = name.lexeme
+
+        # a method called straight off an instance gets the receiver passed
+        # along instead of going through a bound method object
+        def method(env):
+            instance = object(env)
+
+            if instance.__class__ is LoxInstance and lexeme not in instance.fields:
+                if (function := instance.lclass.methods.get(lexeme)) is not None:
+                    return function, instance
+
+            if not isinstance(instance, LoxInstance):
+                raise RuntimeError(name, 'only instances have properties')
+
+            return instance.get(name), None
+
+        return method
+
+    def check_call(self, paren, function, arguments):
+        if not isinstance(function, LoxCallable):
+            raise RuntimeError(paren, 'can only call functions and classes')
+
+        if len(arguments) != function.arity():
+            raise RuntimeError(
+                paren, f'expected {function.arity()} arguments but got {len(arguments)}')
+
+    def call(self, paren, function, receiver, arguments):
+        self.check_call(paren, function, arguments)
+
+        if self.depth == self.plox.max_depth:
+            raise RuntimeError(paren, 'stack overflow')
+
+        self.depth += 1
+
+        try:
+            if receiver is None:
+                value = function.call(self, arguments)
+            else:
+                value = function.invoke(self, receiver, arguments)
+
+        except RecursionError:
+            raise RuntimeError(paren, 'stack overflow')
+
+        except RuntimeError as error:
+            if error.token is None:
+                error.token = paren
+
+            raise
+
+        finally:
+            self.depth -= 1
+
+        return value
+
+    def tail_call(self, paren, function, receiver, arguments):
+        if function.__class__ is not ClosureFunction:
+            self.returned = self.call(paren, function, receiver, arguments)
+            return RETURN
+
+        self.check_call(paren, function, arguments)
+        self.tail = (function, function.receiver if receiver is None else receiver, arguments)
+
+        return TAIL
+
+    def visit_binary(self, expr):
+        left  = self.compile(expr.left)
+        right = self.compile(expr.right)
+        token = expr.operator
+
+        if token.type == TokenType.EQUAL_EQUAL:
+            return lambda env: left(env) == right(env)
+
+        if token.type == TokenType.BANG_EQUAL:
+            return lambda env: not (left(env) == right(env))
+
+        if token.type == TokenType.PLUS and self.plox.ropes:
+            return lambda env: concat(token, left(env), right(env))
+
+        if token.type == TokenType.PLUS:
+            def plus(env):
+                a, b = left(env), right(env)
+
+                if a.__class__ is str or b.__class__ is str:
+                    return f'{a}{b}'
+
+                try:
+                    return a + b
+                except TypeError:
+                    raise RuntimeError(token, 'operands must be numbers or strings')
+
+            return plus
+
+        fn = NUMERIC_OPS[token.type]
+
+        def numeric(env):
+            a, b = left(env), right(env)
+
+            if a.__class__ not in NUMBERS or b.__class__ not in NUMBERS:
+                check_number_operands(token, a, b)
+
+            return fn(a, b)
+
+        return numeric
+
+    def visit_expression_statement(self, stmt):
+        expression = self.compile(stmt.expression)
+
+        def statement(env):
+            expression(env)
+
+        return statement
+
+    def visit_function_statement(self, stmt):
+        key = self.declaration_key(stmt)
+
+        def define(env):
+            env.values[key] = ClosureFunction(stmt, env)
+
+        return define
+
+    def visit_print_statement(self, stmt):
+        value = self.compile(stmt.expression)
+        return lambda env: print(stringify(value(env)), file=self.stdout)
+
+    def visit_break_statement(self, stmt):
+        return lambda env: BREAK
+
+    def visit_continue_statement(self, stmt):
+        return lambda env: CONTINUE
+
+    def visit_return_statement(self, stmt):
+        if stmt.value.__class__ in (Call, Invoke):
+            return self.compile_tail_call(stmt.value)
+
+        value = self.compile(stmt.value) if stmt.value else (lambda env: None)
+
+        def ret(env):
+            self.returned = value(env)
+            return RETURN
+
+        return ret
+
+    def compile_tail_call(self, expr):
+        arguments = tuple(self.compile(arg) for arg in expr.arguments)
+        paren = expr.paren
+
+        if expr.__class__ is Invoke:
+            method = self.compile_method(expr)
+
+            def tail_invoke(env):
+                function, receiver = method(env)
+                return self.tail_call(paren, function, receiver, [arg(env) for arg in arguments])
+
+            return tail_invoke
+
+        callee = self.compile(expr.callee)
+
+        def tail_call(env):
+            return self.tail_call(paren, callee(env), None, [arg(env) for arg in arguments])
+
+        return tail_call
+
+    def visit_var_statement(self, stmt):
+        value = self.compile(stmt.initializer) if stmt.initializer else (lambda env: None)
+        key = self.declaration_key(stmt)
+
+        def define(env):
+            env.values[key] = value(env)
+
+        return define
+
+    def visit_block_statement(self, stmt):
+        body = self.compile_sequence(stmt.statements)
+        size = stmt.scope_size
+
+        return lambda env: body(Environment(env, size))
+
+    def visit_if_statement(self, stmt):
+        condition   = self.compile(stmt.condition)
+        then_branch = self.compile(stmt.then_branch) if stmt.then_branch else (lambda env: None)
+
+        if not stmt.else_branch:
+            def if_then(env):
+                if condition(env):
+                    return then_branch(env)
+
+            return if_then
+
+        else_branch = self.compile(stmt.else_branch)
+
+        def if_else(env):
+            if condition(env):
+                return then_branch(env)
+
+            return else_branch(env)
+
+        return if_else
+
+    def visit_while_statement(self, stmt):
+        condition = self.compile(stmt.condition)
+        body = self.compile(stmt.statement) if stmt.statement else (lambda env: None)
+        increment = self.compile(stmt.increment) if stmt.increment else (lambda env: None)
+
+        def loop(env):
+            while condition(env):
+                if (completion := body(env)) is not None and completion is not CONTINUE:
+                    if completion is BREAK:
+                        break
+
+                    return completion
+
+                increment(env)
+
+        return loop
+
+    def visit_class_statement(self, stmt):
+        superclass_expr = self.compile(stmt.superclass) if stmt.superclass else None
+        name = stmt.name
+        key = self.declaration_key(stmt)
+
+        def define(env):
+            superclass = None
+            env.define(key, None)
+
+            methods_env = env
+
+            if superclass_expr:
+                if not isinstance(superclass := superclass_expr(env), LoxClass):
+                    raise RuntimeError(stmt.superclass.name, 'superclass must be a class')
+
+                methods_env = Environment(env, 1)
+                methods_env.define(0, superclass)
+
+            methods = {}
+
+            for method in stmt.methods:
+                methods[method.name.lexeme] = ClosureFunction(
+                    method,
+                    methods_env,
+                    method.name.lexeme == 'init'
+                )
+
+            env.define(key, LoxClass(name.lexeme, methods, superclass))
+
+        return define
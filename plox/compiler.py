@@ -0,0 +1,261 @@
+# coding: utf-8
+
+from plox.types import OpCode
+from plox.types import TokenType
+
+BINARY_OPS = {
+    TokenType.PLUS         : OpCode.ADD,
+    TokenType.MINUS        : OpCode.SUBTRACT,
+    TokenType.STAR         : OpCode.MULTIPLY,
+    TokenType.SLASH        : OpCode.DIVIDE,
+    TokenType.LESS         : OpCode.LESS,
+    TokenType.GREATER      : OpCode.GREATER,
+    TokenType.EQUAL_EQUAL  : OpCode.EQUAL,
+    TokenType.BANG_EQUAL   : OpCode.NOT_EQUAL,
+    TokenType.LESS_EQUAL   : OpCode.LESS_EQUAL,
+    TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL
+}
+
+class Chunk:
+    def __init__(self, name):
+        self.name = name
+        self.code = []
+        self.constants = []
+
+class Loop:
+    def __init__(self, start, depth):
+        self.start = start
+        self.depth = depth
+        self.breaks = []
+        self.continues = []
+
+class Compiler:
+    def __init__(self, plox):
+        self.plox = plox
+
+        self.chunk = None
+        self.loops = []
+        self.depth = 0
+
+    def compile(self, statements, name='script'):
+        enclosing = (self.chunk, self.loops, self.depth)
+        self.chunk, self.loops, self.depth = Chunk(name), [], 0
+
+        for statement in statements:
+            self.compile_node(statement)
+
+        self.emit(OpCode.NIL)
+        self.emit(OpCode.RETURN)
+
+        chunk = self.chunk
+        self.chunk, self.loops, self.depth = enclosing
+
+        return chunk
+
+    def compile_node(self, node):
+        if node: node.accept(self)
+
+    def emit(self, op, arg=0):
+        self.chunk.code += (int(op), arg)
+        return len(self.chunk.code) - 1
+
+    def emit_constant(self, op, value):
+        self.chunk.constants.append(value)
+        return self.emit(op, len(self.chunk.constants) - 1)
+
+    def emit_jump(self, op):
+        return self.emit(op, -1)
+
+    def patch_jump(self, offset):
+        self.chunk.code[offset] = len(self.chunk.code)
+
+    def emit_scope_exit(self, depth):
+        for _ in range(self.depth - depth):
+            self.emit(OpCode.POP_SCOPE)
+
+    def emit_variable(self, expr, name, local_op, global_op):
+        if (local := expr.local) is not None:
+            self.emit_constant(local_op, local)
+        else:
+            self.emit_constant(global_op, name)
+
+    def declaration_key(self, stmt):
+        if (local := stmt.local) is not None:
+            return local[1]
+
+        return stmt.name.lexeme
+
+    def compile_function(self, stmt):
+        stmt.chunk = self.compile(stmt.body.statements, stmt.name.lexeme)
+
+    def visit_literal(self, expr):
+        if   expr.value is None : self.emit(OpCode.NIL)
+        elif expr.value is True : self.emit(OpCode.TRUE)
+        elif expr.value is False: self.emit(OpCode.FALSE)
+        else                    : self.emit_constant(OpCode.CONSTANT, expr.value)
+
+    def visit_grouping(self, expr):
+        self.compile_node(expr.expression)
+
+    def visit_this(self, expr):
+        self.emit_variable(expr, expr.token, OpCode.GET_LOCAL, OpCode.GET_GLOBAL)
+
+    def visit_variable(self, expr):
+        self.emit_variable(expr, expr.name, OpCode.GET_LOCAL, OpCode.GET_GLOBAL)
+
+    def visit_assignment(self, expr):
+        self.compile_node(expr.value)
+        self.emit_variable(expr, expr.name, OpCode.SET_LOCAL, OpCode.SET_GLOBAL)
+
+    def visit_unary(self, expr):
+        self.compile_node(expr.expression)
+
+        if expr.operator.type == TokenType.MINUS:
+            self.emit_constant(OpCode.NEGATE, expr.operator)
+        else:
+            self.emit(OpCode.NOT)
+
+    def visit_binary(self, expr):
+        self.compile_node(expr.left)
+        self.compile_node(expr.right)
+        if expr.operator.type is TokenType.PLUS and self.plox.ropes:
+            self.emit_constant(OpCode.CONCAT, expr.operator)
+        else:
+            self.emit_constant(BINARY_OPS[expr.operator.type], expr.operator)
+
+    def visit_logical(self, expr):
+        self.compile_node(expr.left)
+
+        end = self.emit_jump(
+            OpCode.JUMP_IF_TRUE_OR_POP if expr.operator.type == TokenType.OR else OpCode.JUMP_IF_FALSE_OR_POP)
+
+        self.compile_node(expr.right)
+        self.patch_jump(end)
+
+    def visit_get(self, expr):
+        self.compile_node(expr.object)
+        self.emit_constant(OpCode.GET_PROPERTY, expr.name)
+
+    def visit_set(self, expr):
+        self.compile_node(expr.object)
+        self.compile_node(expr.value)
+        self.emit_constant(OpCode.SET_PROPERTY, expr.name)
+
+    def visit_super(self, expr):
+        self.emit_constant(OpCode.GET_SUPER, (expr.local[0], expr.method))
+
+    def visit_call(self, expr):
+        self.compile_node(expr.callee)
+
+        for arg in expr.arguments:
+            self.compile_node(arg)
+
+        self.emit_constant(OpCode.CALL, (len(expr.arguments), expr.paren))
+
+    def visit_invoke(self, expr):
+        self.compile_node(expr.object)
+        self.emit_constant(OpCode.GET_METHOD, expr.name)
+
+        for arg in expr.arguments:
+            self.compile_node(arg)
+
+        self.emit_constant(OpCode.INVOKE, (len(expr.arguments), expr.paren))
+
+    def visit_expression_statement(self, stmt):
+        self.compile_node(stmt.expression)
+        self.emit(OpCode.POP)
+
+    def visit_print_statement(self, stmt):
+        self.compile_node(stmt.expression)
+        self.emit(OpCode.PRINT)
+
+    def visit_var_statement(self, stmt):
+        if stmt.initializer:
+            self.compile_node(stmt.initializer)
+        else:
+            self.emit(OpCode.NIL)
+
+        self.emit_constant(OpCode.DEFINE, self.declaration_key(stmt))
+
+    def visit_function_statement(self, stmt):
+        self.compile_function(stmt)
+        self.emit_constant(OpCode.CLOSURE, stmt)
+        self.emit_constant(OpCode.DEFINE, self.declaration_key(stmt))
+
+    def visit_return_statement(self, stmt):
+        if stmt.value:
+            self.compile_node(stmt.value)
+        else:
+            self.emit(OpCode.NIL)
+
+        self.emit(OpCode.RETURN)
+
+    def visit_block_statement(self, stmt):
+        self.emit(OpCode.PUSH_SCOPE, stmt.scope_size)
+        self.depth += 1
+
+        for statement in stmt.statements:
+            self.compile_node(statement)
+
+        self.depth -= 1
+        self.emit(OpCode.POP_SCOPE)
+
+    def visit_if_statement(self, stmt):
+        self.compile_node(stmt.condition)
+        else_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+
+        self.compile_node(stmt.then_branch)
+
+        if stmt.else_branch:
+            end_jump = self.emit_jump(OpCode.JUMP)
+            self.patch_jump(else_jump)
+            self.compile_node(stmt.else_branch)
+            self.patch_jump(end_jump)
+        else:
+            self.patch_jump(else_jump)
+
+    def visit_while_statement(self, stmt):
+        loop = Loop(len(self.chunk.code), self.depth)
+        self.loops.append(loop)
+
+        self.compile_node(stmt.condition)
+        exit_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+
+        self.compile_node(stmt.statement)
+
+        for offset in loop.continues:
+            self.patch_jump(offset)
+
+        if stmt.increment:
+            self.compile_node(stmt.increment)
+            self.emit(OpCode.POP)
+
+        self.emit(OpCode.LOOP, loop.start)
+
+        self.patch_jump(exit_jump)
+        self.loops.pop()
+
+        for offset in loop.breaks:
+            self.patch_jump(offset)
+
+    def visit_break_statement(self, stmt):
+        self.emit_scope_exit(self.loops[-1].depth)
+        self.loops[-1].breaks.append(self.emit_jump(OpCode.JUMP))
+
+    def visit_continue_statement(self, stmt):
+        self.emit_scope_exit(self.loops[-1].depth)
+        self.loops[-1].continues.append(self.emit_jump(OpCode.JUMP))
+
+    def visit_class_statement(self, stmt):
+        key = self.declaration_key(stmt)
+
+        self.emit(OpCode.NIL)
+        self.emit_constant(OpCode.DEFINE, key)
+
+        if stmt.superclass:
+            self.compile_node(stmt.superclass)
+
+        for method in stmt.methods:
+            self.compile_function(method)
+
+        self.emit_constant(OpCode.CLASS, (stmt, key))
@@ -0,0 +1,148 @@
+# coding: utf-8
+
+import io
+
+from plox.rope import Rope
+from plox.__main__ import PLox, run_deep
+from plox.native import LoxList, LoxMap, List, Map
+
+# compile(source) runs the front end (scanner, parser, resolver, optimizer)
+# once and keeps the resolved statements. Program.run starts a new engine
+# each time, defines the globals it is given and interprets the same
+# statements: nothing is scanned, parsed or resolved again. output is
+# captured on the engine's own stream (or written to the stdout given,
+# sys.stdout is never swapped, runs on other threads are unaffected) and
+# errors come back in the Result instead of going to stderr. both run on an engine thread, the
+# host's recursion limit is left as it was.
+#
+#   import plox
+#
+#   program = plox.compile('print limit - used;')
+#   result = program.run(globals={'limit': 10, 'used': 3})
+#   result.output, result.errors, result.status
+
+class Error:
+    __slots__ = ('line', 'where', 'message')
+
+    def __init__(self, line, where, message):
+        self.line = line
+        self.where = where
+        self.message = message
+
+    def __str__(self):
+        return f'line {self.line}: {self.where} {self.message}' if self.where else f'line {self.line}: {self.message}'
+
+    def __repr__(self):
+        return f'Error({self.line}, {self.where!r}, {self.message!r})'
+
+class Result:
+    __slots__ = ('status', 'output', 'errors', 'globals')
+
+    # status is the exit code run_file would give: 65 for compile errors,
+    # 70 for a runtime error and the code passed to exit()
+    def __init__(self, status, output, errors, globals):
+        self.status = status
+        self.output = output
+        self.errors = errors
+        self.globals = globals
+
+    def __repr__(self):
+        return f'Result({self.status}, {self.output!r}, {self.errors!r})'
+
+class EmbeddedPLox(PLox):
+    def __init__(self, engine, optimize, max_depth, ropes):
+        self.errors = []
+        super().__init__(engine, optimize, max_depth, ropes=ropes)
+
+    def report(self, line, where, message, ofile=None):
+        self.errors.append(Error(line, '' if where == '\b' else where, message))
+
+def to_lox(value):
+    if value is None or value.__class__ in (bool, int, float, str):
+        return value
+
+    if isinstance(value, (list, tuple)):
+        return LoxList(List, [to_lox(element) for element in value])
+
+    if isinstance(value, dict):
+        lmap = LoxMap(Map)
+        lmap.entries = {to_lox(key): to_lox(item) for key, item in value.items()}
+
+        return lmap
+
+    if value.__class__.__module__.startswith('plox.'):
+        return value
+
+    raise TypeError(f'can not pass {value.__class__.__name__} to lox')
+
+def from_lox(value, seen=None):
+    if value.__class__ is Rope:
+        return str(value)
+
+    if value.__class__ in (LoxList, LoxMap):
+        # a list or map that holds itself comes back holding its copy
+        seen = {} if seen is None else seen
+
+        if id(value) in seen:
+            return seen[id(value)]
+
+        if value.__class__ is LoxList:
+            seen[id(value)] = result = []
+            result.extend(from_lox(element, seen) for element in value.elements)
+        else:
+            seen[id(value)] = result = {}
+            result.update((from_lox(key, seen), from_lox(item, seen)) for key, item in value.entries.items())
+
+        return result
+
+    return value
+
+class Program:
+    def __init__(self, statements, errors, engine, optimize, max_depth, ropes):
+        self.statements = statements
+        self.errors = errors
+        self.engine = engine
+        self.optimize = optimize
+        self.max_depth = max_depth
+        self.ropes = ropes
+
+    def run(self, globals=None, stdout=None):
+        if self.errors:
+            return Result(65, '', list(self.errors), {})
+
+        return run_deep(self.max_depth, self.execute, globals or {}, stdout)
+
+    def execute(self, globals, stdout):
+        plox = EmbeddedPLox(self.engine, self.optimize, self.max_depth, self.ropes)
+        interpreter = plox.interpreter
+
+        natives = dict(interpreter.globals.values)
+
+        for name, value in globals.items():
+            interpreter.globals.values[name] = to_lox(value)
+
+        output = interpreter.stdout = stdout or io.StringIO()
+        status = 0
+
+        try:
+            interpreter.interpret(self.statements)
+        except SystemExit as exit:
+            status = exit.code if isinstance(exit.code, int) else 1
+        finally:
+            plox.shutdown()
+
+        if plox.runtime_error_occured:
+            status = 70
+
+        return Result(
+            status,
+            output.getvalue() if stdout is None else None,
+            plox.errors,
+            {name: from_lox(value) for name, value in interpreter.globals.values.items() if natives.get(name) is not value}
+        )
+
+def compile(source, engine='tree', optimize=True, max_depth=10000, ropes=False):
+    plox = EmbeddedPLox(engine, optimize, max_depth, ropes)
+    statements = plox.compile(source)
+
+    return Program(statements, plox.errors, engine, optimize, max_depth, ropes)
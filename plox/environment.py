@@ -3,18 +3,18 @@
 from plox.error import RuntimeError
 
 class Environment:
-    def __init__(self, enclosing=None):
-        self.values = {}
+    def __init__(self, enclosing=None, size=0):
+        self.values = [None] * size
         self.enclosing = enclosing
 
-    def define(self, name, value):
-        self.values[name] = value
+    def define(self, key, value):
+        self.values[key] = value
 
-    def get_at(self, distance, name):
-        return self.ancestor(distance).values[name]
+    def get_at(self, distance, slot):
+        return self.ancestor(distance).values[slot]
 
-    def assign_at(self, distance, name, value):
-        self.ancestor(distance).values[name.lexeme] = value
+    def assign_at(self, distance, slot, value):
+        self.ancestor(distance).values[slot] = value
 
     def ancestor(self, distance):
         env = self
@@ -24,21 +24,19 @@ class Environment:
 
         return env
 
+class GlobalEnvironment(Environment):
+    def __init__(self):
+        self.values = {}
+        self.enclosing = None
+
     def get(self, name):
         try:
             return self.values[name.lexeme]
         except KeyError:
-
-            if self.enclosing:
-                return self.enclosing.get(name)
-
             raise RuntimeError(name, f'undefined variable "{name.lexeme}"')
 
     def assign(self, name, value):
         if name.lexeme in self.values:
             self.values[name.lexeme] = value; return
 
-        if self.enclosing:
-            self.enclosing.assign(name, value); return
-
-        raise RuntimeError(name, f'undefined variable "{name.lexeme}"')
\ No newline at end of file
+        raise RuntimeError(name, f'undefined variable "{name.lexeme}"')
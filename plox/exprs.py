@@ -1,16 +1,23 @@
 # coding: utf-8
 
+from plox.operators import BINARY, UNARY, LOGICAL
+
 class Expression:
-    pass
+    __slots__ = ()
 
 class Variable(Expression):
+    __slots__ = ('name', 'local')
+
     def __init__(self, name):
         self.name = name
+        self.local = None
 
     def accept(self, visitor):
         return visitor.visit_variable(self)
 
 class Literal(Expression):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
@@ -18,6 +25,8 @@ class Literal(Expression):
         return visitor.visit_literal(self)
 
 class Grouping(Expression):
+    __slots__ = ('expression',)
+
     def __init__(self, expression):
         self.expression = expression
 
@@ -25,21 +34,29 @@ class Grouping(Expression):
         return visitor.visit_grouping(self)
 
 class This(Expression):
+    __slots__ = ('token', 'local')
+
     def __init__(self, token):
         self.token = token
+        self.local = None
 
     def accept(self, visitor):
         return visitor.visit_this(self)
 
 class Super(Expression):
+    __slots__ = ('token', 'method', 'local')
+
     def __init__(self, token, method):
         self.token = token
         self.method = method
+        self.local = None
 
     def accept(self, visitor):
         return visitor.visit_super(self)
 
 class Get(Expression):
+    __slots__ = ('name', 'object')
+
     def __init__(self, object, name):
         self.name = name
         self.object = object
@@ -48,6 +65,8 @@ class Get(Expression):
         return visitor.visit_get(self)
 
 class Set(Expression):
+    __slots__ = ('name', 'value', 'object')
+
     def __init__(self, object, name, value):
         self.name = name
         self.value = value
@@ -57,22 +76,30 @@ class Set(Expression):
         return visitor.visit_set(self)
 
 class Unary(Expression):
+    __slots__ = ('operator', 'expression', 'handler')
+
     def __init__(self, operator, expression):
         self.operator = operator
         self.expression = expression
+        self.handler = UNARY[operator.type]
 
     def accept(self, visitor):
         return visitor.visit_unary(self)
 
 class Assignment(Expression):
+    __slots__ = ('name', 'value', 'local')
+
     def __init__(self, name, value):
         self.name = name
         self.value = value
+        self.local = None
 
     def accept(self, visitor):
         return visitor.visit_assignment(self)
 
 class Call(Expression):
+    __slots__ = ('paren', 'callee', 'arguments')
+
     def __init__(self, callee, paren, arguments):
         self.paren = paren
         self.callee = callee
@@ -81,20 +108,38 @@ class Call(Expression):
     def accept(self, visitor):
         return visitor.visit_call(self)
 
+class Invoke(Expression):
+    __slots__ = ('name', 'paren', 'object', 'arguments')
+
+    def __init__(self, object, name, paren, arguments):
+        self.name = name
+        self.paren = paren
+        self.object = object
+        self.arguments = arguments
+
+    def accept(self, visitor):
+        return visitor.visit_invoke(self)
+
 class Logical(Expression):
+    __slots__ = ('left', 'right', 'operator', 'handler')
+
     def __init__(self, left, operator, right):
         self.left = left
         self.right = right
         self.operator = operator
+        self.handler = LOGICAL[operator.type]
 
     def accept(self, visitor):
         return visitor.visit_logical(self)
 
 class Binary(Expression):
+    __slots__ = ('left', 'right', 'operator', 'handler')
+
     def __init__(self, l_expr, operator, r_expr):
         self.left = l_expr
         self.right = r_expr
         self.operator = operator
+        self.handler = BINARY[operator.type]
 
     def accept(self, visitor):
         return visitor.visit_binary(self)
\ No newline at end of file
@@ -1,16 +1,10 @@
 # coding: utf-8
 
-from numbers import Number
+from plox.exprs import Call, Invoke
+from plox.types import Completion
+from plox.environment import Environment, GlobalEnvironment
 
-from plox.types import TokenType
-from plox.environment import Environment
-
-from plox.error import (
-    RuntimeError,
-    BreakException,
-    ReturnException,
-    ContinueException
-)
+from plox.error import RuntimeError
 
 from plox.callable import (
     LoxClass,
@@ -19,6 +13,8 @@ from plox.callable import (
     LoxFunction
 )
 
+BREAK, CONTINUE, RETURN, TAIL = Completion
+
 def is_truthy(object):
     return bool(object)
 
@@ -31,20 +27,23 @@ def stringify(object):
 
     return str(object)
 
-def check_number_operands(operator, *operands):
-    if all(map(lambda o: isinstance(o, Number), operands)):
-        return
-
-    raise RuntimeError(operator, 'operands must be numbers')
-
 class Interpreter:
     def __init__(self, plox):
         self.plox = plox
-        self.locals = {}
-        self.globals = Environment()
+        self.globals = GlobalEnvironment()
         self.environment = self.globals
+        self.returned = None
+        self.tail = None
+        self.depth = 0
+
+        # print writes here, None is whatever sys.stdout is at the time. an
+        # engine of its own (an embedded run) is given its own stream, so
+        # that runs on other threads do not swap sys.stdout under it
+        self.stdout = None
 
     def interpret(self, statements):
+        self.depth = 0
+
         try:
             for statement in statements:
                 self.execute(statement)
@@ -52,20 +51,30 @@ class Interpreter:
         except RuntimeError as error:
             self.plox.runtime_error(error)
 
-    def resolve(self, expr, depth):
-        self.locals[expr] = depth
+    def wait(self, request):
+        return request.block()
 
     def look_up_variable(self, name, expr):
-        if (distance := self.locals.get(expr, None)) is not None:
-            return self.environment.get_at(distance, name.lexeme)
+        if (local := expr.local) is not None:
+            return self.environment.get_at(*local)
 
         return self.globals.get(name)
 
+    def define(self, stmt, value):
+        if (local := stmt.local) is not None:
+            self.environment.define(local[1], value)
+        else:
+            self.environment.define(stmt.name.lexeme, value)
+
     def evaluate(self, expr):
         if expr: return expr.accept(self)
 
+    # statements complete with None, or with a Completion when they cut the
+    # enclosing blocks short. the value of a return is left in self.returned
+    # for the function call that consumes the RETURN
+
     def execute(self, stmt):
-        if stmt: stmt.accept(self)
+        if stmt: return stmt.accept(self)
 
     def execute_block(self, statements, environment):
         previous = self.environment
@@ -74,7 +83,8 @@ class Interpreter:
             self.environment = environment
 
             for statement in statements:
-                self.execute(statement)
+                if (completion := statement.accept(self)) is not None:
+                    return completion
 
         finally:
             self.environment = previous
@@ -92,38 +102,23 @@ class Interpreter:
         return self.look_up_variable(expr.name, expr)
 
     def visit_unary(self, expr):
-        right = self.evaluate(expr.expression)
-
-        if expr.operator.type == TokenType.MINUS:
-            check_number_operands(expr.operator, right)
-            return -1 * right
-
-        elif expr.operator.type == TokenType.BANG:
-            return not is_truthy(right)
-
-        return None
+        return expr.handler(expr.operator, expr.expression.accept(self))
 
     def visit_assignment(self, expr):
         value = self.evaluate(expr.value)
 
-        if (distance := self.locals.get(expr, None)) is not None:
-            self.environment.assign_at(distance, expr.name, value)
+        if (local := expr.local) is not None:
+            self.environment.assign_at(*local, value)
         else:
             self.globals.assign(expr.name, value)
 
         return value
 
     def visit_logical(self, expr):
-        left = self.evaluate(expr.left)
-
-        if expr.operator.type == TokenType.OR:
-            if is_truthy(left):
-                return left
-        else:
-            if not is_truthy(left):
-                return left
+        if expr.handler(left := expr.left.accept(self)):
+            return left
 
-        return self.evaluate(expr.right)
+        return expr.right.accept(self)
 
     def visit_get(self, expr):
         object = self.evaluate(expr.object)
@@ -145,10 +140,10 @@ class Interpreter:
         return value
 
     def visit_super(self, expr):
-        distance = self.locals[expr]
+        distance, _ = expr.local
 
-        superclass = self.environment.get_at(distance, 'super')
-        object     = self.environment.get_at(distance - 1, 'this')
+        superclass = self.environment.get_at(distance, 0)
+        object     = self.environment.get_at(distance - 1, 0)
         method     = superclass.find_method(expr.method.lexeme)
 
         if not method:
@@ -160,61 +155,107 @@ class Interpreter:
         function  = self.evaluate(expr.callee)
         arguments = [self.evaluate(arg) for arg in expr.arguments]
 
+        return self.call(expr.paren, function, None, arguments)
+
+    def visit_invoke(self, expr):
+        function, receiver = self.look_up_method(expr)
+        arguments = [self.evaluate(arg) for arg in expr.arguments]
+
+        return self.call(expr.paren, function, receiver, arguments)
+
+    def look_up_method(self, expr):
+        object = self.evaluate(expr.object)
+
+        # a method called straight off an instance gets the receiver passed
+        # along instead of going through a bound method object
+        if object.__class__ is LoxInstance and expr.name.lexeme not in object.fields:
+            if (method := object.lclass.methods.get(expr.name.lexeme)) is not None:
+                return method, object
+
+        if not isinstance(object, LoxInstance):
+            raise RuntimeError(expr.name, 'only instances have properties')
+
+        return object.get(expr.name), None
+
+    def check_call(self, paren, function, arguments):
         if not isinstance(function, LoxCallable):
-            raise RuntimeError(expr.paren, 'can only call functions and classes')
+            raise RuntimeError(paren, 'can only call functions and classes')
 
         if len(arguments) != function.arity():
             raise RuntimeError(
-                expr.paren, f'expected {function.arity()} arguments but got {len(arguments)}')
+                paren, f'expected {function.arity()} arguments but got {len(arguments)}')
 
-        return function.call(self, arguments)
+    def call(self, paren, function, receiver, arguments):
+        self.check_call(paren, function, arguments)
+
+        if self.depth == self.plox.max_depth:
+            raise RuntimeError(paren, 'stack overflow')
+
+        self.depth += 1
 
-    def _plus(self, left, right, operator): # called by visit_binary func
         try:
-            if isinstance(left, str) or isinstance(right, str):
-                return f'{left}{right}'
-
-            return left + right
-        except TypeError:
-            raise RuntimeError(operator, 'operands must be numbers or strings')
-
-    def visit_binary(self, expr):
-        left  = self.evaluate(expr.left)
-        right = self.evaluate(expr.right)
-
-        if expr.operator.type not in [TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL, TokenType.PLUS]:
-            check_number_operands(expr.operator, left, right)
-
-        return {
-            TokenType.LESS         : lambda: left < right,
-            TokenType.GREATER      : lambda: left > right,
-            TokenType.STAR         : lambda: left * right,
-            TokenType.SLASH        : lambda: left / right,
-            TokenType.MINUS        : lambda: left - right,
-            TokenType.EQUAL_EQUAL  : lambda: left == right,
-            TokenType.LESS_EQUAL   : lambda: left <= right,
-            TokenType.GREATER_EQUAL: lambda: left >= right,
-            TokenType.BANG_EQUAL   : lambda: not (left == right),
-            TokenType.PLUS         : lambda: self._plus(left, right, expr.operator)
-        }.get(expr.operator.type, lambda: None)()
+            if receiver is None:
+                value = function.call(self, arguments)
+            else:
+                value = function.invoke(self, receiver, arguments)
+
+        except RecursionError:
+            raise RuntimeError(paren, 'stack overflow')
+
+        except RuntimeError as error:
+            if error.token is None:
+                error.token = paren
+
+            raise
+
+        finally:
+            self.depth -= 1
+
+        return value
+
+    def tail_call(self, paren, function, receiver, arguments):
+        if function.__class__ is not LoxFunction:
+            self.returned = self.call(paren, function, receiver, arguments)
+            return RETURN
+
+        self.check_call(paren, function, arguments)
+        self.tail = (function, function.receiver if receiver is None else receiver, arguments)
+
+        return TAIL
+
+    def visit_binary(self, expr): # operator semantics live in plox.operators
+        return expr.handler(expr.operator, expr.left.accept(self), expr.right.accept(self))
 
     def visit_expression_statement(self, stmt):
         self.evaluate(stmt.expression)
 
     def visit_function_statement(self, stmt):
-        self.environment.define(stmt.name.lexeme, LoxFunction(stmt, self.environment))
+        self.define(stmt, LoxFunction(stmt, self.environment))
 
     def visit_print_statement(self, stmt):
-        print(stringify(self.evaluate(stmt.expression)))
+        print(stringify(self.evaluate(stmt.expression)), file=self.stdout)
 
     def visit_break_statement(self, stmt):
-        raise BreakException()
+        return BREAK
 
     def visit_continue_statement(self, stmt):
-        raise ContinueException()
+        return CONTINUE
 
     def visit_return_statement(self, stmt):
-        raise ReturnException(self.evaluate(stmt.value))
+        if (value := stmt.value).__class__ is Call:
+            function  = self.evaluate(value.callee)
+            arguments = [self.evaluate(arg) for arg in value.arguments]
+
+            return self.tail_call(value.paren, function, None, arguments)
+
+        if value.__class__ is Invoke:
+            function, receiver = self.look_up_method(value)
+            arguments = [self.evaluate(arg) for arg in value.arguments]
+
+            return self.tail_call(value.paren, function, receiver, arguments)
+
+        self.returned = self.evaluate(value)
+        return RETURN
 
     def visit_var_statement(self, stmt):
         value = None
@@ -222,38 +263,38 @@ class Interpreter:
         if stmt.initializer:
             value = self.evaluate(stmt.initializer)
 
-        self.environment.define(stmt.name.lexeme, value)
+        self.define(stmt, value)
 
     def visit_block_statement(self, stmt):
-        self.execute_block(stmt.statements, Environment(self.environment))
+        return self.execute_block(stmt.statements, Environment(self.environment, stmt.scope_size))
 
     def visit_if_statement(self, stmt):
         if is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.then_branch)
+            return self.execute(stmt.then_branch)
 
-        elif stmt.else_branch:
-            self.execute(stmt.else_branch)
+        return self.execute(stmt.else_branch)
 
     def visit_while_statement(self, stmt):
         while is_truthy(self.evaluate(stmt.condition)):
-            try:
-                self.execute(stmt.statement)
-            except BreakException:
-                break
-            except ContinueException:
-                continue
+            if (completion := self.execute(stmt.statement)) is not None and completion is not CONTINUE:
+                if completion is BREAK:
+                    break
+
+                return completion
+
+            self.evaluate(stmt.increment)
 
     def visit_class_statement(self, stmt):
         superclass = None
 
-        self.environment.define(stmt.name.lexeme, None)
+        self.define(stmt, None)
 
         if stmt.superclass:
             if not isinstance(superclass := self.evaluate(stmt.superclass), LoxClass):
                 raise RuntimeError(stmt.superclass.name, 'superclass must be a class')
 
-            self.environment = Environment(self.environment)
-            self.environment.define('super', superclass)
+            self.environment = Environment(self.environment, 1)
+            self.environment.define(0, superclass)
 
         methods = {}
 
@@ -267,4 +308,4 @@ class Interpreter:
         if stmt.superclass:
             self.environment = self.environment.enclosing
 
-        self.environment.assign(stmt.name, LoxClass(stmt.name.lexeme, methods, superclass))
\ No newline at end of file
+        self.define(stmt, LoxClass(stmt.name.lexeme, methods, superclass))
\ No newline at end of file
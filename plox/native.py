@@ -1,16 +1,61 @@
 # coding: utf-8
 
 import numbers
+import operator
+import collections
 import time, math
 
-from plox.callable import LoxCallable
+from array import array
+from reprlib import recursive_repr
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from plox.error import RuntimeError
+from plox.callable import LoxCallable, LoxInstance, LoxFunction
+from plox.interpreter import stringify
+from plox.tasks import Wait, Delay, ReadLine, Join, Receive
+
+# a native that raises RuntimeError without a token gets the paren of the
+# call that reached it
+
+def is_number(value):
+    return value.__class__ is int or value.__class__ is float
+
+class MathFunction(LoxCallable):
+    def __init__(self, name, function, ufunc):
+        self.name = name
+        self.ufunc = ufunc # the numpy equivalent, Array.map uses it
+        self.function = function
+
+    def __str__(self):
+        return f'<native fn {self.name}>'
 
-class Abs(LoxCallable):
     def arity(self):
         return 1
 
+    # Array.map gives nan and inf where a function is undefined, like the
+    # numpy ufuncs do, a single call is an error there
+    def apply(self, value):
+        try:
+            return self.function(value)
+        except ValueError:
+            return math.nan
+        except OverflowError:
+            return math.inf
+
     def call(self, interpreter, arguments):
-        return abs(arguments[0])
+        if not is_number(arguments[0]):
+            raise RuntimeError(None, f'{self.name} takes a number')
+
+        try:
+            return self.function(arguments[0])
+        except ValueError:
+            raise RuntimeError(None, f'{self.name} is undefined for {stringify(arguments[0])}')
+        except OverflowError:
+            raise RuntimeError(None, f'{self.name} of {stringify(arguments[0])} is out of range')
 
 class Pow(LoxCallable):
     def arity(self):
@@ -38,26 +83,482 @@ class Sleep(LoxCallable):
         return 1
 
     def call(self, interpreter, arguments):
-        time.sleep(arguments[0])
+        return interpreter.wait(Delay(arguments[0]))
 
 class Input(LoxCallable):
     def arity(self):
         return 1
 
     def call(self, interpreter, arguments):
-        value = input(arguments[0])
+        return interpreter.wait(ReadLine(arguments[0]))
+
+# List and Map are instances to the engines, so their methods are found
+# through the same Get (and Invoke) path as the methods of a lox class. a
+# method is looked up by its name token and keeps it, errors are reported
+# against the property that was called.
+
+class NativeMethod(LoxCallable):
+    def __init__(self, instance, name, arity, function):
+        self.name = name
+        self.instance = instance
+        self.function = function
+        self.method_arity = arity
+
+    def __str__(self):
+        return f'<native method {self.name.lexeme}>'
+
+    def arity(self):
+        return self.method_arity
+
+    def call(self, interpreter, arguments):
+        value = self.function(self.instance, self.name, *arguments)
+        return interpreter.wait(value) if isinstance(value, Wait) else value
+
+class NativeInstance(LoxInstance):
+    methods = {}
+
+    def get(self, name):
+        if (method := self.methods.get(name.lexeme)) is None:
+            raise RuntimeError(name, f'undefined property {name.lexeme}')
+
+        return NativeMethod(self, name, *method)
+
+    def set(self, name, value):
+        raise RuntimeError(name, f'can not set fields on {self.lclass.name}')
+
+    @classmethod
+    def construct(cls, lclass):
+        return cls(lclass)
+
+class NativeClass(LoxCallable):
+    def __init__(self, name, instance_class, arity=0):
+        self.name = name
+        self.class_arity = arity
+        self.instance_class = instance_class
+
+    def __str__(self):
+        return f'<native class "{self.name}">'
+
+    def arity(self):
+        return self.class_arity
+
+    def call(self, interpreter, arguments):
+        return self.instance_class.construct(self, *arguments)
+
+def check_index(name, index, size):
+    if index.__class__ not in (int, float) or index % 1:
+        raise RuntimeError(name, 'index must be an integer')
+
+    if not 0 <= index < size:
+        raise RuntimeError(name, f'index {stringify(index)} out of range')
+
+    return int(index)
+
+class LoxList(NativeInstance):
+    def __init__(self, lclass, elements=None):
+        super().__init__(lclass)
+        self.elements = [] if elements is None else elements
+
+    # a list can hold itself
+    @recursive_repr('[...]')
+    def __str__(self):
+        return f'[{", ".join(map(stringify, self.elements))}]'
+
+    def pop(self, name):
+        if not self.elements:
+            raise RuntimeError(name, 'pop from empty list')
+
+        return self.elements.pop()
+
+    def set_item(self, name, index, value):
+        self.elements[check_index(name, index, len(self.elements))] = value
+
+    def insert(self, name, index, value):
+        self.elements.insert(check_index(name, index, len(self.elements) + 1), value)
+
+    methods = {
+        'push'  : (1, lambda self, name, value: self.elements.append(value)),
+        'pop'   : (0, pop),
+        'get'   : (1, lambda self, name, index: self.elements[check_index(name, index, len(self.elements))]),
+        'set'   : (2, set_item),
+        'insert': (2, insert),
+        'remove': (1, lambda self, name, index: self.elements.pop(check_index(name, index, len(self.elements)))),
+        'len'   : (0, lambda self, name: len(self.elements))
+    }
+
+class LoxMap(NativeInstance):
+    def __init__(self, lclass):
+        super().__init__(lclass)
+        self.entries = {}
+
+    @recursive_repr('{...}')
+    def __str__(self):
+        return '{' + ', '.join(f'{stringify(k)}: {stringify(v)}' for k, v in self.entries.items()) + '}'
 
-        try   : return float(value)
-        except: return value
+    def get_item(self, name, key):
+        if key not in self.entries:
+            raise RuntimeError(name, f'undefined key {stringify(key)}')
+
+        return self.entries[key]
+
+    def set_item(self, name, key, value):
+        self.entries[key] = value
+
+    def remove(self, name, key):
+        value = self.get_item(name, key)
+        del self.entries[key]
+
+        return value
+
+    methods = {
+        'get'   : (1, get_item),
+        'set'   : (2, set_item),
+        'has'   : (1, lambda self, name, key: key in self.entries),
+        'remove': (1, remove),
+        'len'   : (0, lambda self, name: len(self.entries)),
+        'keys'  : (0, lambda self, name: LoxList(List, list(self.entries))),
+        'values': (0, lambda self, name: LoxList(List, list(self.entries.values())))
+    }
+
+# Array holds floats in a numpy array when numpy is installed and in an
+# array.array otherwise (seen through a memoryview, which slices without
+# copying the same way numpy does). element-wise operations and reductions
+# run as one native call over the whole array and return new arrays, slices
+# are views that write through to the array they were taken from.
+
+class LoxArray(NativeInstance):
+    def __init__(self, lclass, data):
+        super().__init__(lclass)
+        self.data = data
+
+    @classmethod
+    def construct(cls, lclass, source):
+        if isinstance(source, LoxList):
+            if not all(map(is_number, source.elements)):
+                raise RuntimeError(None, 'array elements must be numbers')
+
+            values = source.elements
+
+        elif is_number(source) and source >= 0 and not source % 1:
+            values = [0.0] * int(source)
+
+        else:
+            raise RuntimeError(None, 'Array takes a size or a list of numbers')
+
+        return cls(lclass, numpy.array(values, dtype=float) if numpy else memoryview(array('d', values)))
+
+    def __str__(self):
+        return f'[{", ".join(stringify(float(value)) for value in self.data)}]'
+
+    def wrap(self, data):
+        return LoxArray(self.lclass, data if numpy else memoryview(data))
+
+    def operand(self, name, other):
+        if isinstance(other, LoxArray):
+            if len(other.data) != len(self.data):
+                raise RuntimeError(name, 'arrays differ in length')
+
+            return other.data
+
+        if not is_number(other):
+            raise RuntimeError(name, 'operand must be an array or a number')
+
+        return other
+
+    def elementwise(self, name, other, op):
+        other = self.operand(name, other)
+
+        if numpy:
+            return self.wrap(op(self.data, other))
+
+        if isinstance(other, memoryview):
+            return self.wrap(array('d', map(op, self.data, other)))
+
+        return self.wrap(array('d', [op(value, other) for value in self.data]))
+
+    def reduce(self, name, function):
+        if len(self.data) == 0:
+            raise RuntimeError(name, 'empty array')
+
+        return float(function(self.data))
+
+    def set_item(self, name, index, value):
+        if not is_number(value):
+            raise RuntimeError(name, 'array elements must be numbers')
+
+        self.data[check_index(name, index, len(self.data))] = value
+
+    def scale(self, name, factor):
+        if not is_number(factor):
+            raise RuntimeError(name, 'operand must be a number')
+
+        return self.elementwise(name, factor, operator.mul)
+
+    def dot(self, name, other):
+        if not isinstance(other, LoxArray):
+            raise RuntimeError(name, 'operand must be an array')
+
+        other = self.operand(name, other)
+        return float(numpy.dot(self.data, other)) if numpy else math.fsum(map(operator.mul, self.data, other))
+
+    def map(self, name, function):
+        if not isinstance(function, MathFunction):
+            raise RuntimeError(name, 'map takes a native math function')
+
+        if numpy:
+            with numpy.errstate(all='ignore'):
+                return self.wrap(getattr(numpy, function.ufunc)(self.data))
+
+        return self.wrap(array('d', map(function.apply, self.data)))
+
+    def slice(self, name, start, end):
+        if not (is_number(start) and is_number(end) and 0 <= start <= end <= len(self.data)) or start % 1 or end % 1:
+            raise RuntimeError(name, 'slice out of range')
+
+        return self.wrap(self.data[int(start):int(end)])
+
+    methods = {
+        'get'   : (1, lambda self, name, index: float(self.data[check_index(name, index, len(self.data))])),
+        'set'   : (2, set_item),
+        'len'   : (0, lambda self, name: len(self.data)),
+        'add'   : (1, lambda self, name, other: self.elementwise(name, other, operator.add)),
+        'mul'   : (1, lambda self, name, other: self.elementwise(name, other, operator.mul)),
+        'scale' : (1, scale),
+        'sum'   : (0, lambda self, name: float(self.data.sum()) if numpy else math.fsum(self.data)),
+        'min'   : (0, lambda self, name: self.reduce(name, numpy.min if numpy else min)),
+        'max'   : (0, lambda self, name: self.reduce(name, numpy.max if numpy else max)),
+        'dot'   : (1, dot),
+        'map'   : (1, map),
+        'slice' : (2, slice),
+        'toList': (0, lambda self, name: LoxList(List, [float(value) for value in self.data]))
+    }
+
+# the parts appended to a StringBuilder are joined once, when the text is
+# asked for, instead of copying the string built so far on every append
+
+class LoxStringBuilder(NativeInstance):
+    def __init__(self, lclass):
+        super().__init__(lclass)
+        self.parts = []
+        self.length = 0
+
+    def __str__(self):
+        if len(self.parts) > 1:
+            self.parts[:] = [''.join(self.parts)]
+
+        return self.parts[0] if self.parts else ''
+
+    def append(self, name, value):
+        text = value if value.__class__ is str else stringify(value)
+
+        self.parts.append(text)
+        self.length += len(text)
+
+        return self
+
+    methods = {
+        'append'  : (1, append),
+        'len'     : (0, lambda self, name: self.length),
+        'toString': (0, lambda self, name: str(self))
+    }
+
+# memo(fn, maxsize) wraps a callable in a cache of its results keyed by the
+# argument values (instances by identity), the least recently used entries go
+# once there are maxsize of them (nil keeps them all). rebinding the wrapped
+# function's name to the memo sends its recursive calls through the cache too.
+
+class Memo(NativeInstance, LoxCallable):
+    def __init__(self, lclass, function, maxsize):
+        super().__init__(lclass)
+        self.function = function
+        self.maxsize = maxsize
+        self.results = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __str__(self):
+        return f'<memo {self.function}>'
+
+    def arity(self):
+        return self.function.arity()
+
+    def call(self, interpreter, arguments):
+        # the class is part of the key so that 1, 1.0 and true stay apart
+        key = tuple((argument.__class__, argument) for argument in arguments)
+
+        if key in self.results:
+            self.hits += 1
+            self.results.move_to_end(key)
+
+            return self.results[key]
+
+        self.misses += 1
+        value = self.results[key] = self.function.call(interpreter, arguments)
+
+        if self.maxsize is not None and len(self.results) > self.maxsize:
+            self.results.popitem(last=False)
+
+        return value
+
+    def clear(self, name):
+        self.results.clear()
+        self.hits = self.misses = 0
+
+    methods = {
+        'hits'  : (0, lambda self, name: self.hits),
+        'misses': (0, lambda self, name: self.misses),
+        'size'  : (0, lambda self, name: len(self.results)),
+        'clear' : (0, clear)
+    }
+
+class MemoFunction(LoxCallable):
+    name = 'memo'
+
+    def arity(self):
+        return 2
+
+    def call(self, interpreter, arguments):
+        function, maxsize = arguments
+
+        if not isinstance(function, LoxCallable):
+            raise RuntimeError(None, 'memo takes a function')
+
+        if maxsize is not None and not (is_number(maxsize) and maxsize >= 0 and not maxsize % 1):
+            raise RuntimeError(None, 'memo size must be a non-negative integer or nil')
+
+        return Memo(self, function, maxsize if maxsize is None else int(maxsize))
+
+class ParallelMap(LoxCallable):
+    def arity(self):
+        return 2
+
+    def call(self, interpreter, arguments):
+        function, sequence = arguments
+
+        if not (isinstance(function, LoxFunction) and function.closure is interpreter.globals and
+                function.receiver is None and function.arity() == 1):
+            raise RuntimeError(None, 'parallel_map takes a top-level function of one argument')
+
+        if not isinstance(sequence, LoxList):
+            raise RuntimeError(None, 'parallel_map takes a list')
+
+        # imported on first use, the process pool is not needed otherwise
+        from plox.parallel import is_data, parallel_map
+
+        if not all(map(is_data, sequence.elements)):
+            raise RuntimeError(None, 'parallel_map can only send numbers, strings, booleans, nil, lists and maps')
+
+        return parallel_map(interpreter, function, sequence.elements)
+
+# spawn(fn) runs fn as a task next to the script on the vm: a task runs until
+# it waits (sleep, input, join, receive on an empty channel) and the others
+# go on meanwhile. join(task) waits for the value fn returned. channels are
+# unbounded queues, receive waits for a value when there is none.
+
+class LoxTask(NativeInstance):
+    def __init__(self, lclass, function, frames):
+        super().__init__(lclass)
+        self.function = function
+        self.frames = frames
+        self.handle = None
+
+    def __str__(self):
+        return f'<task {self.function}>'
+
+    methods = {
+        'done': (0, lambda self, name: self.handle is not None and self.handle.done())
+    }
+
+class Spawn(LoxCallable):
+    name = 'spawn'
+
+    def arity(self):
+        return 1
+
+    def call(self, interpreter, arguments):
+        function, = arguments
+
+        if not (isinstance(function, LoxFunction) and function.arity() == 0):
+            raise RuntimeError(None, 'spawn takes a function of no arguments')
+
+        if not hasattr(interpreter, 'scheduler'):
+            raise RuntimeError(None, 'tasks need the vm engine')
+
+        task = LoxTask(self, function, interpreter.task(function))
+        interpreter.scheduler.spawn(task)
+
+        return task
+
+class JoinFunction(LoxCallable):
+    def arity(self):
+        return 1
+
+    def call(self, interpreter, arguments):
+        task, = arguments
+
+        if not isinstance(task, LoxTask):
+            raise RuntimeError(None, 'join takes a task')
+
+        return interpreter.wait(Join(task))
+
+class LoxChannel(NativeInstance):
+    def __init__(self, lclass):
+        super().__init__(lclass)
+        self.items = collections.deque()
+        self.waiters = collections.deque()
+
+    def __str__(self):
+        return f'<channel {len(self.items)}>'
+
+    def send(self, name, value):
+        # a receiver already waiting takes the value directly
+        while self.waiters:
+            if not (waiter := self.waiters.popleft()).done():
+                return waiter.set_result(value)
+
+        self.items.append(value)
+
+    def receive(self, name):
+        return self.items.popleft() if self.items else Receive(self)
+
+    methods = {
+        'send'   : (1, send),
+        'receive': (0, receive),
+        'len'    : (0, lambda self, name: len(self.items))
+    }
+
+List  = NativeClass('List', LoxList)
+Map   = NativeClass('Map', LoxMap)
+Array = NativeClass('Array', LoxArray, 1)
+
+StringBuilder = NativeClass('StringBuilder', LoxStringBuilder)
+Channel       = NativeClass('Channel', LoxChannel)
 
 def init_functions(interpreter):
     functions = {
-        'abs'  : Abs(),
+        'abs'  : MathFunction('abs', abs, 'absolute'),
+        'sqrt' : MathFunction('sqrt', math.sqrt, 'sqrt'),
+        'floor': MathFunction('floor', math.floor, 'floor'),
+        'sin'  : MathFunction('sin', math.sin, 'sin'),
+        'cos'  : MathFunction('cos', math.cos, 'cos'),
+        'exp'  : MathFunction('exp', math.exp, 'exp'),
+        'log'  : MathFunction('log', math.log, 'log'),
         'pow'  : Pow(),
         'exit' : Exit(),
         'clock': Clock(),
         'sleep': Sleep(),
-        'input': Input()
+        'input': Input(),
+        'memo' : MemoFunction(),
+        'List' : List,
+        'Map'  : Map,
+        'Array': Array,
+
+        'StringBuilder': StringBuilder,
+        'parallel_map' : ParallelMap(),
+
+        'spawn'  : Spawn(),
+        'join'   : JoinFunction(),
+        'Channel': Channel
     }
 
     for name, fn in functions.items():
@@ -0,0 +1,112 @@
+# coding: utf-8
+
+from numbers import Number
+
+from plox.types import TokenType
+from plox.error import RuntimeError
+
+# exact-type guard for the common case, the Number ABC check only runs when
+# an operand is something else (bools, or a type error about to be raised)
+NUMBERS = frozenset((int, float))
+
+def check_number_operands(operator, *operands):
+    if all(map(lambda o: isinstance(o, Number), operands)):
+        return
+
+    raise RuntimeError(operator, 'operands must be numbers')
+
+def plus(operator, left, right):
+    if left.__class__ is str or right.__class__ is str:
+        return f'{left}{right}'
+
+    try:
+        return left + right
+    except TypeError:
+        raise RuntimeError(operator, 'operands must be numbers or strings')
+
+def minus(operator, left, right):
+    if left.__class__ not in NUMBERS or right.__class__ not in NUMBERS:
+        check_number_operands(operator, left, right)
+
+    return left - right
+
+def star(operator, left, right):
+    if left.__class__ not in NUMBERS or right.__class__ not in NUMBERS:
+        check_number_operands(operator, left, right)
+
+    return left * right
+
+def slash(operator, left, right):
+    if left.__class__ not in NUMBERS or right.__class__ not in NUMBERS:
+        check_number_operands(operator, left, right)
+
+    return left / right
+
+def less(operator, left, right):
+    if left.__class__ not in NUMBERS or right.__class__ not in NUMBERS:
+        check_number_operands(operator, left, right)
+
+    return left < right
+
+def less_equal(operator, left, right):
+    if left.__class__ not in NUMBERS or right.__class__ not in NUMBERS:
+        check_number_operands(operator, left, right)
+
+    return left <= right
+
+def greater(operator, left, right):
+    if left.__class__ not in NUMBERS or right.__class__ not in NUMBERS:
+        check_number_operands(operator, left, right)
+
+    return left > right
+
+def greater_equal(operator, left, right):
+    if left.__class__ not in NUMBERS or right.__class__ not in NUMBERS:
+        check_number_operands(operator, left, right)
+
+    return left >= right
+
+def equal(operator, left, right):
+    return left == right
+
+def not_equal(operator, left, right):
+    return not (left == right)
+
+def negate(operator, right):
+    if right.__class__ not in NUMBERS:
+        check_number_operands(operator, right)
+
+    return -1 * right
+
+def bang(operator, right):
+    return not right
+
+def logical_or(left):
+    return bool(left)
+
+def logical_and(left):
+    return not left
+
+BINARY = {
+    TokenType.PLUS         : plus,
+    TokenType.MINUS        : minus,
+    TokenType.STAR         : star,
+    TokenType.SLASH        : slash,
+    TokenType.LESS         : less,
+    TokenType.GREATER      : greater,
+    TokenType.EQUAL_EQUAL  : equal,
+    TokenType.BANG_EQUAL   : not_equal,
+    TokenType.LESS_EQUAL   : less_equal,
+    TokenType.GREATER_EQUAL: greater_equal
+}
+
+UNARY = {
+    TokenType.MINUS: negate,
+    TokenType.BANG : bang
+}
+
+# a logical handler tells whether the left operand already decides the result
+LOGICAL = {
+    TokenType.OR : logical_or,
+    TokenType.AND: logical_and
+}
@@ -0,0 +1,212 @@
+# coding: utf-8
+
+from plox.exprs import *
+from plox.stmts import *
+from plox.error import RuntimeError
+
+# runs between the resolver and the interpreter: folds operators applied to
+# literals, drops branches with constant conditions and unwraps blocks that
+# declare nothing (like the for-loop body shell when there is no increment).
+# unwrapping removes a runtime environment, so resolved accesses reaching past
+# it get their depth lowered. folds that would fail are left for the runtime
+# to report with the original token.
+
+class Optimizer:
+    def __init__(self):
+        self.scopes = []
+
+    def optimize(self, statements):
+        return self.optimize_statements(statements)
+
+    def optimize_node(self, node):
+        return node.accept(self) if node else node
+
+    def optimize_statements(self, statements):
+        result = []
+
+        for stmt in statements:
+            if isinstance(stmt, BlockStatement) and stmt.scope_size == 0:
+                result += self.unwrap_block(stmt)
+
+            elif (stmt := self.optimize_node(stmt)):
+                result.append(stmt)
+
+        return result
+
+    def optimize_branch(self, stmt):
+        # a branch holds a single statement, a block that would unwrap to
+        # more than one (through nested blocks) is kept
+        if isinstance(stmt, BlockStatement) and stmt.scope_size == 0 and self.unwrapped_size(stmt) < 2:
+            return next(iter(self.unwrap_block(stmt)), None)
+
+        return self.optimize_node(stmt)
+
+    def unwrapped_size(self, stmt):
+        if isinstance(stmt, BlockStatement) and stmt.scope_size == 0:
+            return sum(map(self.unwrapped_size, stmt.statements))
+
+        return 1
+
+    def unwrap_block(self, stmt):
+        self.scopes.append(False)
+        statements = self.optimize_statements(stmt.statements)
+        self.scopes.pop()
+
+        return statements
+
+    def relocate(self, expr):
+        if expr.local is None:
+            return
+
+        depth, slot = expr.local
+
+        if (removed := self.scopes[len(self.scopes) - depth:].count(False)):
+            expr.local = (depth - removed, slot)
+
+    def fold(self, expr, fn, *operands):
+        if not all(isinstance(operand, Literal) for operand in operands):
+            return expr
+
+        try:
+            return Literal(fn(*(operand.value for operand in operands)))
+        except (RuntimeError, ArithmeticError, TypeError):
+            return expr
+
+    def visit_literal(self, expr):
+        return expr
+
+    def visit_grouping(self, expr):
+        expr.expression = self.optimize_node(expr.expression)
+        return expr.expression if isinstance(expr.expression, Literal) else expr
+
+    def visit_this(self, expr):
+        self.relocate(expr)
+        return expr
+
+    def visit_variable(self, expr):
+        self.relocate(expr)
+        return expr
+
+    def visit_super(self, expr):
+        self.relocate(expr)
+        return expr
+
+    def visit_assignment(self, expr):
+        expr.value = self.optimize_node(expr.value)
+        self.relocate(expr)
+
+        return expr
+
+    def visit_unary(self, expr):
+        expr.expression = self.optimize_node(expr.expression)
+        return self.fold(expr, lambda right: expr.handler(expr.operator, right), expr.expression)
+
+    def visit_binary(self, expr):
+        expr.left  = self.optimize_node(expr.left)
+        expr.right = self.optimize_node(expr.right)
+
+        return self.fold(
+            expr, lambda left, right: expr.handler(expr.operator, left, right), expr.left, expr.right)
+
+    def visit_logical(self, expr):
+        expr.left  = self.optimize_node(expr.left)
+        expr.right = self.optimize_node(expr.right)
+
+        if not isinstance(expr.left, Literal):
+            return expr
+
+        return expr.left if expr.handler(expr.left.value) else expr.right
+
+    def visit_get(self, expr):
+        expr.object = self.optimize_node(expr.object)
+        return expr
+
+    def visit_set(self, expr):
+        expr.object = self.optimize_node(expr.object)
+        expr.value  = self.optimize_node(expr.value)
+
+        return expr
+
+    def visit_call(self, expr):
+        expr.callee = self.optimize_node(expr.callee)
+        expr.arguments = [self.optimize_node(arg) for arg in expr.arguments]
+
+        return expr
+
+    def visit_invoke(self, expr):
+        expr.object = self.optimize_node(expr.object)
+        expr.arguments = [self.optimize_node(arg) for arg in expr.arguments]
+
+        return expr
+
+    def visit_expression_statement(self, stmt):
+        stmt.expression = self.optimize_node(stmt.expression)
+        return stmt
+
+    def visit_print_statement(self, stmt):
+        stmt.expression = self.optimize_node(stmt.expression)
+        return stmt
+
+    def visit_return_statement(self, stmt):
+        stmt.value = self.optimize_node(stmt.value)
+        return stmt
+
+    def visit_var_statement(self, stmt):
+        stmt.initializer = self.optimize_node(stmt.initializer)
+        return stmt
+
+    def visit_break_statement(self, stmt):
+        return stmt
+
+    def visit_continue_statement(self, stmt):
+        return stmt
+
+    def visit_block_statement(self, stmt):
+        self.scopes.append(True)
+        stmt.statements = self.optimize_statements(stmt.statements)
+        self.scopes.pop()
+
+        return stmt
+
+    def visit_function_statement(self, stmt):
+        self.scopes.append(True)
+        stmt.body.statements = self.optimize_statements(stmt.body.statements)
+        self.scopes.pop()
+
+        return stmt
+
+    def visit_class_statement(self, stmt):
+        stmt.superclass = self.optimize_node(stmt.superclass)
+
+        if stmt.superclass:
+            self.scopes.append(True)
+
+        for method in stmt.methods:
+            self.visit_function_statement(method)
+
+        if stmt.superclass:
+            self.scopes.pop()
+
+        return stmt
+
+    def visit_if_statement(self, stmt):
+        stmt.condition = self.optimize_node(stmt.condition)
+
+        if isinstance(stmt.condition, Literal):
+            return self.optimize_branch(stmt.then_branch if stmt.condition.value else stmt.else_branch)
+
+        stmt.then_branch = self.optimize_branch(stmt.then_branch)
+        stmt.else_branch = self.optimize_branch(stmt.else_branch)
+
+        return stmt
+
+    def visit_while_statement(self, stmt):
+        stmt.condition = self.optimize_node(stmt.condition)
+
+        if isinstance(stmt.condition, Literal) and not stmt.condition.value:
+            return None
+
+        stmt.statement = self.optimize_branch(stmt.statement)
+        stmt.increment = self.optimize_node(stmt.increment)
+
+        return stmt
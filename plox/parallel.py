@@ -0,0 +1,200 @@
+# coding: utf-8
+
+import io
+import os
+import pickle
+import hashlib
+
+from concurrent.futures import ProcessPoolExecutor
+
+from plox.rope import Rope
+from plox.token import Token
+from plox.types import TokenType
+from plox.exprs import Expression, Variable, Assignment
+from plox.stmts import Statement, ClassStatement
+from plox.error import RuntimeError
+from plox.callable import LoxClass, LoxFunction
+from plox.native import NativeInstance, LoxList, LoxMap, List
+
+from plox.vm import VM
+from plox.closures import ClosureInterpreter
+
+# parallel_map(fn, list) sends a top-level function to worker processes as
+# its resolved declaration, together with every global it reads: data values
+# are copied, functions and classes are sent the same way and defined again
+# in the worker. each worker keeps one PLox for the engine the caller runs
+# on and reuses it (and the program last loaded into it) from call to call.
+# workers see copies of the globals, assignments made there do not come back.
+# the pools belong to the PLox and are shut down when its program ends.
+
+def is_data(value):
+    if value is None or value.__class__ in (bool, int, float, str, Rope):
+        return True
+
+    if value.__class__ is LoxList:
+        return all(map(is_data, value.elements))
+
+    if value.__class__ is LoxMap:
+        return all(is_data(key) and is_data(item) for key, item in value.entries.items())
+
+    return False
+
+def walk(node):
+    yield node
+
+    for slot in node.__class__.__slots__:
+        value = getattr(node, slot, None)
+
+        for value in (value if isinstance(value, list) else (value,)):
+            if isinstance(value, (Expression, Statement)):
+                yield from walk(value)
+
+class Program:
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.statements = []
+        self.values = {}
+        self.names = set()
+
+    def add_node(self, node):
+        for node in walk(node):
+            if isinstance(node, (Variable, Assignment)) and node.local is None:
+                self.add_global(node.name.lexeme)
+
+    def add_global(self, name):
+        if name in self.names or name not in self.interpreter.globals.values:
+            return
+
+        self.names.add(name)
+        value = self.interpreter.globals.values[name]
+
+        if is_data(value):
+            self.values[name] = value
+
+        elif isinstance(value, LoxFunction) and value.closure is self.interpreter.globals:
+            self.add_node(value.declaration)
+            self.statements.append(value.declaration)
+
+        elif isinstance(value, LoxClass):
+            self.add_class(name, value)
+
+        # natives are defined in the worker already, except for the values
+        # they create (lists with instances in them, memos, arrays)
+        elif value.__class__.__module__ != 'plox.native' or isinstance(value, NativeInstance):
+            raise RuntimeError(None, f'parallel_map can not send "{name}" to worker processes')
+
+    def add_class(self, name, lclass):
+        superclass = None
+        methods = list(lclass.methods.values())
+
+        if lclass.superclass:
+            self.add_global(lclass.superclass.name)
+            superclass = Variable(Token(TokenType.IDENTIFIER, lclass.superclass.name, None, 0))
+
+            # inherited methods come back with the superclass, only the
+            # ones declared in this class (or overriding) are its own
+            methods = [method for method in methods if method not in lclass.superclass.methods.values()]
+
+        # the methods of a top-level class close over the globals, or over
+        # the scope holding just the superclass
+        for method in methods:
+            if not (method.closure is self.interpreter.globals or lclass.superclass and
+                    method.closure.enclosing is self.interpreter.globals and method.closure.values == [lclass.superclass]):
+                raise RuntimeError(None, f'parallel_map can not send "{name}" to worker processes')
+
+            self.add_node(method.declaration)
+
+        self.statements.append(ClassStatement(
+            Token(TokenType.IDENTIFIER, name, None, 0), [method.declaration for method in methods], superclass))
+
+def engine_name(interpreter):
+    if isinstance(interpreter, VM):
+        return 'vm'
+
+    return 'closure' if isinstance(interpreter, ClosureInterpreter) else 'tree'
+
+def get_pool(plox, engine, workers):
+    if (engine, workers) not in plox.pools:
+        plox.pools[engine, workers] = ProcessPoolExecutor(workers, initializer=init_worker, initargs=(engine,))
+
+    return plox.pools[engine, workers]
+
+def parallel_map(interpreter, function, elements):
+    program = Program(interpreter)
+    program.names.add(name := function.declaration.name.lexeme)
+
+    program.add_node(function.declaration)
+    program.statements.append(function.declaration)
+
+    payload = pickle.dumps((program.statements, program.values, name), pickle.HIGHEST_PROTOCOL)
+    key = hashlib.sha256(payload).hexdigest()
+
+    workers = interpreter.plox.workers or os.cpu_count()
+    size = max(1, -(-len(elements) // (workers * 4)))
+    chunks = [elements[i:i + size] for i in range(0, len(elements), size)]
+
+    results = []
+
+    for status, value, output in get_pool(interpreter.plox, engine_name(interpreter), workers).map(
+            run_chunk, [key] * len(chunks), [payload] * len(chunks), chunks):
+        print(output, end='', file=interpreter.stdout)
+
+        if status == 'error':
+            raise RuntimeError(*value)
+
+        results += value
+
+    return LoxList(List, results)
+
+# runs in the worker processes
+
+worker = None
+
+def init_worker(engine):
+    global worker
+    from plox.__main__ import PLox
+
+    worker = {'plox': PLox(engine), 'key': None, 'function': None}
+
+def load(key, payload):
+    interpreter = worker['plox'].interpreter
+    statements, values, name = pickle.loads(payload)
+
+    interpreter.globals.values.update(values)
+    interpreter.interpret(statements)
+
+    worker['key'] = key
+    worker['function'] = interpreter.globals.values[name]
+
+def run_chunk(key, payload, arguments):
+    from plox.__main__ import run_deep
+
+    # on an engine thread, like programs the main process runs
+    return run_deep(worker['plox'].max_depth, call_chunk, key, payload, arguments)
+
+def call_chunk(key, payload, arguments):
+    if worker['key'] != key:
+        load(key, payload)
+
+    interpreter = worker['plox'].interpreter
+    function = worker['function']
+
+    output = interpreter.stdout = io.StringIO()
+    results = []
+
+    for argument in arguments:
+        try:
+            value = function.call(interpreter, [argument])
+
+        except RuntimeError as error:
+            return 'error', (error.token, error.message), output.getvalue()
+
+        except RecursionError:
+            return 'error', (function.declaration.name, 'stack overflow'), output.getvalue()
+
+        if not is_data(value):
+            return 'error', (function.declaration.name, 'parallel_map results must be data values'), output.getvalue()
+
+        results.append(value)
+
+    return 'ok', results, output.getvalue()
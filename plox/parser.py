@@ -5,38 +5,74 @@ from plox.stmts import *
 from plox.token import Token
 from plox.types import TokenType
 from plox.error import ParseError
+from plox.rope import concat
+
+# binding power of the infix operators, a higher one binds tighter. every
+# level is left-associative, so the right operand is parsed one level up
+PRECEDENCE = {
+    TokenType.OR           : 1,
+    TokenType.AND          : 2,
+    TokenType.BANG_EQUAL   : 3,
+    TokenType.EQUAL_EQUAL  : 3,
+    TokenType.LESS         : 4,
+    TokenType.GREATER      : 4,
+    TokenType.LESS_EQUAL   : 4,
+    TokenType.GREATER_EQUAL: 4,
+    TokenType.PLUS         : 5,
+    TokenType.MINUS        : 5,
+    TokenType.STAR         : 6,
+    TokenType.SLASH        : 6
+}
+
+LOGICAL_OPERATORS = frozenset((TokenType.OR, TokenType.AND))
+
+# the parser looks one token ahead: self.current is the next token to
+# consume and self.prev the last one consumed, so any iterable of tokens
+# ending with EOF works, including the scanner's generator
 
 class Parser:
-    __current = 0
-
     def __init__(self, plox, tokens):
         self.plox = plox
-        self.tokens = tokens
+        self.tokens = iter(tokens)
+        self.prev = None
+        self.current = next(self.tokens)
+
+        self._statements = {
+            TokenType.IF        : self.if_statement,
+            TokenType.FOR       : self.for_statement,
+            TokenType.FUN       : lambda: self.function('function'),
+            TokenType.PRINT     : self.print_statement,
+            TokenType.BREAK     : self.break_statement,
+            TokenType.WHILE     : self.while_statement,
+            TokenType.CLASS     : self.class_statement,
+            TokenType.RETURN    : self.return_statement,
+            TokenType.CONTINUE  : self.continue_statement,
+            TokenType.LEFT_BRACE: self.block_statement
+        }
 
     def is_at_end(self):
-        return self.__current >= len(self.tokens) or \
-            self.peek().type == TokenType.EOF
+        return self.current.type is TokenType.EOF
 
     def peek(self):
-        return self.tokens[self.__current]
+        return self.current
 
     def previous(self):
-        return self.tokens[self.__current - 1]
+        return self.prev
 
     def advance(self):
-        self.__current += 1
-        return self.previous()
+        self.prev = self.current
 
-    def check(self, t_type):
-        if self.is_at_end():
-            return False
+        if self.current.type is not TokenType.EOF:
+            self.current = next(self.tokens)
 
-        return self.peek().type == t_type
+        return self.prev
+
+    def check(self, t_type):
+        return self.current.type is t_type and t_type is not TokenType.EOF
 
     def match(self, *types):
-        for t_type in types:
-            if self.check(t_type):
-                self.advance(); return True
+        if self.current.type in types and not self.is_at_end():
+            self.advance(); return True
 
         return False
 
@@ -75,16 +111,8 @@ class Parser:
         return VarStatement(name, init)
 
     def statement(self):
-        if self.match(TokenType.IF): return self.if_statement()
-        if self.match(TokenType.FOR): return self.for_statement()
-        if self.match(TokenType.FUN): return self.function('function')
-        if self.match(TokenType.PRINT): return self.print_statement()
-        if self.match(TokenType.BREAK): return self.break_statement()
-        if self.match(TokenType.WHILE): return self.while_statement()
-        if self.match(TokenType.CLASS): return self.class_statement()
-        if self.match(TokenType.RETURN): return self.return_statement()
-        if self.match(TokenType.CONTINUE): return self.continue_statement()
-        if self.match(TokenType.LEFT_BRACE): return self.block_statement()
+        if (statement := self._statements.get(self.current.type)) is not None:
+            self.advance(); return statement()
 
         return self.expression_statement()
 
@@ -92,10 +120,10 @@ class Parser:
         return self.assignment()
 
     def assignment(self):
-        expr = self.or_expr()
+        expr = self.binary(1)
 
-        if self.match(TokenType.EQUAL):
-            equals = self.previous()
+        if self.current.type is TokenType.EQUAL:
+            equals = self.advance()
             value  = self.assignment()
 
             if isinstance(expr, Variable):
@@ -108,57 +136,27 @@ class Parser:
 
         return expr
 
-    def or_expr(self):
-        expr = self.and_expr()
-
-        while self.match(TokenType.OR):
-            expr = Logical(expr, self.previous(), self.and_expr())
-
-        return expr
-
-    def and_expr(self):
-        expr = self.equality()
-
-        while self.match(TokenType.AND):
-            expr = Logical(expr, self.previous(), self.equality())
-
-        return expr
-
-    def equality(self):
-        expr = self.comparsion()
-
-        while self.match(TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL):
-            expr = Binary(expr, self.previous(), self.comparsion())
-
-        return expr
-
-    def comparsion(self):
-        expr = self.addition()
-
-        while self.match(TokenType.LESS, TokenType.GREATER, TokenType.LESS_EQUAL, TokenType.GREATER_EQUAL):
-            expr = Binary(expr, self.previous(), self.addition())
-
-        return expr
-
-    def addition(self):
-        expr = self.multiplication()
-
-        while self.match(TokenType.PLUS, TokenType.MINUS):
-            expr = Binary(expr, self.previous(), self.multiplication())
+    def binary(self, min_precedence):
+        expr = self.unary()
 
-        return expr
+        while (precedence := PRECEDENCE.get(self.current.type, 0)) >= min_precedence:
+            operator = self.advance()
+            right = self.binary(precedence + 1)
 
-    def multiplication(self):
-        expr = self.unary()
+            if operator.type in LOGICAL_OPERATORS:
+                expr = Logical(expr, operator, right)
+            else:
+                expr = Binary(expr, operator, right)
 
-        while self.match(TokenType.STAR, TokenType.SLASH):
-            expr = Binary(expr, self.previous(), self.unary())
+                if operator.type is TokenType.PLUS and self.plox.ropes:
+                    expr.handler = concat
 
         return expr
 
     def unary(self):
-        if self.match(TokenType.BANG, TokenType.MINUS):
-            return Unary(self.previous(), self.unary())
+        if self.current.type is TokenType.BANG or self.current.type is TokenType.MINUS:
+            operator = self.advance()
+            return Unary(operator, self.unary())
 
         return self.call()
 
@@ -166,10 +164,12 @@ class Parser:
         expr = self.primary()
 
         while True:
-            if self.match(TokenType.LEFT_PAREN):
+            if self.current.type is TokenType.LEFT_PAREN:
+                self.advance()
                 expr = self.finish_call(expr)
 
-            elif self.match(TokenType.DOT):
+            elif self.current.type is TokenType.DOT:
+                self.advance()
                 name = self.consume(TokenType.IDENTIFIER, "expect property name after '.'")
                 expr = Get(expr, name)
 
@@ -187,33 +187,41 @@ class Parser:
             while self.match(TokenType.COMMA):
                 arguments.append(self.expression())
 
-        return Call(callee, self.consume(TokenType.RIGHT_PAREN, 'expect ")" after arguments'), arguments)
+        paren = self.consume(TokenType.RIGHT_PAREN, 'expect ")" after arguments')
+
+        if isinstance(callee, Get): # obj.method(...) calls the method without binding it first
+            return Invoke(callee.object, callee.name, paren, arguments)
+
+        return Call(callee, paren, arguments)
 
     def primary(self):
-        if self.match(TokenType.NIL): return Literal(None)
-        if self.match(TokenType.TRUE): return Literal(True)
-        if self.match(TokenType.FALSE): return Literal(False)
+        token = self.current
+        t_type = token.type
+
+        if t_type is TokenType.IDENTIFIER:
+            self.advance(); return Variable(token)
 
-        if self.match(TokenType.THIS):
-            return This(self.previous())
+        if t_type is TokenType.NUMBER or t_type is TokenType.STRING:
+            self.advance(); return Literal(token.literal)
 
-        if self.match(TokenType.IDENTIFIER):
-            return Variable(self.previous())
+        if t_type is TokenType.THIS : self.advance(); return This(token)
+        if t_type is TokenType.NIL  : self.advance(); return Literal(None)
+        if t_type is TokenType.TRUE : self.advance(); return Literal(True)
+        if t_type is TokenType.FALSE: self.advance(); return Literal(False)
 
-        if self.match(TokenType.NUMBER, TokenType.STRING):
-            return Literal(self.previous().literal)
+        if t_type is TokenType.LEFT_PAREN:
+            self.advance()
 
-        if self.match(TokenType.LEFT_PAREN):
             expr = self.expression()
             self.consume(TokenType.RIGHT_PAREN, 'expected ")" after expression')
             return Grouping(expr)
 
-        if self.match(TokenType.SUPER):
-            token = self.previous()
+        if t_type is TokenType.SUPER:
+            self.advance()
             self.consume(TokenType.DOT, 'expect "." after super')
             return Super(token, self.consume(TokenType.IDENTIFIER, 'expect superclass method name'))
 
-        raise self.error(self.peek(), 'expect expression')
+        raise self.error(token, 'expect expression')
 
     def expression_statement(self):
         value = self.expression()
@@ -270,16 +278,10 @@ class Parser:
         increment = None if self.check(TokenType.RIGHT_PAREN) else self.expression()
         self.consume(TokenType.RIGHT_PAREN, "expect ')' after clauses")
 
-        return BlockStatement([
-            init, 
-            WhileStatement(
-                condition, 
-                BlockStatement([
-                    self.statement(), 
-                    increment
-                ])
-            )
-        ])
+        # the increment stays on the loop so that "continue" still runs it
+        loop = WhileStatement(condition, self.statement(), increment)
+
+        return BlockStatement([init, loop]) if init else loop
 
     def if_statement(self):
         self.consume(TokenType.LEFT_PAREN, 'expect "(" after "if"')
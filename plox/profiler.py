@@ -0,0 +1,314 @@
+# coding: utf-8
+
+import sys
+import json
+import time
+import threading
+
+from plox.token import Token
+from plox.exprs import Expression
+from plox.stmts import Statement, BlockStatement
+from plox.native import NativeClass, NativeMethod, MathFunction
+from plox.callable import LoxClass, LoxFunction
+from plox.interpreter import Interpreter, TAIL
+
+# --profile swaps the tree-walking engine for this subclass, so the plain
+# Interpreter keeps running without a single extra check. every call made
+# through Interpreter.call (lox functions, classes and natives) is timed on
+# a stack of [name, start, time spent in callees] records, and every executed
+# statement counts a hit (by statement, they are put on their first source
+# line once the profile is reported). a tail call replaces the record on top
+# of the stack the same way it replaces the lox frame.
+
+def first_line(node):
+    lines = []
+
+    for slot in node.__class__.__slots__:
+        value = getattr(node, slot, None)
+
+        for value in (value if isinstance(value, list) else (value,)):
+            if isinstance(value, Token):
+                lines.append(value.line)
+
+            elif isinstance(value, (Expression, Statement)) and (line := first_line(value)):
+                lines.append(line)
+
+    return min(lines, default=None)
+
+def function_name(function):
+    if isinstance(function, LoxFunction):
+        return f'{function.declaration.name.lexeme}:{function.declaration.name.line}'
+
+    if isinstance(function, LoxClass):
+        return function.name
+
+    if isinstance(function, (NativeClass, MathFunction)):
+        return f'<native {function.name}>'
+
+    if isinstance(function, NativeMethod):
+        return f'<native {function.instance.lclass.name}.{function.name.lexeme}>'
+
+    return f'<native {function.__class__.__name__.lower()}>'
+
+class Profile:
+    def __init__(self):
+        self.calls = {}
+        self.inclusive = {}
+        self.exclusive = {}
+        self.statement_hits = {}
+
+        self.stack = []
+        self.active = {}
+
+    def enter(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.active[name] = self.active.get(name, 0) + 1
+        self.stack.append([name, time.perf_counter(), 0.0])
+
+    def leave(self):
+        name, start, callees = self.stack.pop()
+        elapsed = time.perf_counter() - start
+
+        self.exclusive[name] = self.exclusive.get(name, 0.0) + elapsed - callees
+
+        # a recursive function only counts the time of its outermost call
+        if (active := self.active[name] - 1) == 0:
+            self.inclusive[name] = self.inclusive.get(name, 0.0) + elapsed
+
+        self.active[name] = active
+
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    def line_hits(self):
+        line_hits = {}
+
+        # a block only counts the statements in it
+        for stmt, hits in self.statement_hits.items():
+            if stmt.__class__ is not BlockStatement:
+                line = first_line(stmt) or 0 # 0 when nothing carries a token
+                line_hits[line] = line_hits.get(line, 0) + hits
+
+        return line_hits
+
+    def dump(self, file_name):
+        profile = {
+            'functions': {
+                name: {
+                    'calls': self.calls[name],
+                    'inclusive': self.inclusive.get(name, 0.0),
+                    'exclusive': self.exclusive.get(name, 0.0)
+                } for name in self.calls
+            },
+            'lines': {str(line): hits for line, hits in sorted(self.line_hits().items())}
+        }
+
+        with open(file_name, 'w') as f:
+            json.dump(profile, f, indent=2)
+
+    def report(self, ofile=None, limit=20):
+        ofile = ofile or sys.stderr
+
+        print(f'{"function":<32}{"calls":>10}{"inclusive":>12}{"exclusive":>12}', file=ofile)
+
+        for name in sorted(self.calls, key=lambda name: -self.exclusive.get(name, 0.0)):
+            inclusive = self.inclusive.get(name, 0.0)
+            exclusive = self.exclusive.get(name, 0.0)
+            print(f'{name:<32}{self.calls[name]:>10}{inclusive:>11.4f}s{exclusive:>11.4f}s', file=ofile)
+
+        print(f'\n{"line":<8}{"hits":>10}', file=ofile)
+
+        for line, hits in sorted(self.line_hits().items(), key=lambda item: -item[1])[:limit]:
+            print(f'{line or "?":<8}{hits:>10}', file=ofile)
+
+class ProfilingInterpreter(Interpreter):
+    def __init__(self, plox):
+        super().__init__(plox)
+        self.profile = Profile()
+        self.hits = self.profile.statement_hits
+        self.names = {}
+
+    def interpret(self, statements):
+        self.profile.enter('<script>')
+
+        try:
+            super().interpret(statements)
+        finally:
+            while self.profile.stack:
+                self.profile.leave()
+
+    def execute(self, stmt):
+        if stmt:
+            hits = self.hits
+            hits[stmt] = hits.get(stmt, 0) + 1
+
+            return stmt.accept(self)
+
+    def execute_block(self, statements, environment):
+        previous = self.environment
+
+        try:
+            self.environment = environment
+
+            for statement in statements:
+                if (completion := self.execute(statement)) is not None:
+                    return completion
+
+        finally:
+            self.environment = previous
+
+    def function_name(self, function):
+        # the name of a lox function is worked out once per declaration
+        if function.__class__ is not LoxFunction:
+            return function_name(function)
+
+        if (name := self.names.get(function.declaration)) is None:
+            name = self.names[function.declaration] = function_name(function)
+
+        return name
+
+    def call(self, paren, function, receiver, arguments):
+        # the cached name is looked up in place, a method call here costs
+        # more than the rest of the bookkeeping
+        if function.__class__ is not LoxFunction or (name := self.names.get(function.declaration)) is None:
+            name = self.function_name(function)
+
+        self.profile.enter(name)
+        depth = len(self.profile.stack)
+
+        try:
+            return super().call(paren, function, receiver, arguments)
+        finally:
+            # records of calls a runtime error unwound past are closed here too
+            while len(self.profile.stack) >= depth:
+                self.profile.leave()
+
+    def tail_call(self, paren, function, receiver, arguments):
+        if (completion := super().tail_call(paren, function, receiver, arguments)) is TAIL:
+            self.profile.leave()
+            self.profile.enter(self.function_name(function))
+
+        return completion
+
+# --sample keeps a shadow stack of (function, statement that made the call)
+# pairs and the statement running right now, and a timer reads it every
+# interval. the samples are written as collapsed stacks, one
+# "frame;frame;frame count" line per distinct stack, where a frame is the
+# function name and the line it was executing.
+
+class Sampler:
+    def __init__(self, interpreter, interval):
+        self.interval = interval
+        self.interpreter = interpreter
+        self.samples = {}
+        self.thread = None
+        self.running = False
+
+    def sample(self):
+        interpreter = self.interpreter
+        stack = (*interpreter.stack, interpreter.statement)
+        self.samples[stack] = self.samples.get(stack, 0) + 1
+
+    def start(self):
+        self.running = True
+
+        # programs run on an engine thread and signal handlers only ever run
+        # on the main thread, so a thread takes the samples. the gil is
+        # handed over at least every interval while it does, or a sample
+        # would wait for the default switch interval (5ms)
+        self.switch = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch, self.interval))
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while self.running:
+            time.sleep(self.interval)
+            self.sample()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+        sys.setswitchinterval(self.switch)
+
+    def frame(self, function, stmt, lines):
+        if stmt not in lines:
+            lines[stmt] = (stmt and first_line(stmt)) or '?'
+
+        if function is None:
+            return f'<script>:{lines[stmt]}'
+
+        name = function.declaration.name.lexeme if isinstance(function, LoxFunction) else function_name(function)
+        return f'{name}:{lines[stmt]}'
+
+    def write(self, file_name):
+        lines = {}
+        collapsed = {}
+
+        for stack, count in self.samples.items():
+            # each frame pairs with the statement its callee was called from,
+            # the innermost one with the statement that was running
+            functions = (None, *(function for function, _ in stack[1:-1]))
+            statements = (*(callsite for _, callsite in stack[1:-1]), stack[-1])
+
+            key = ';'.join(self.frame(*frame, lines) for frame in zip(functions, statements))
+            collapsed[key] = collapsed.get(key, 0) + count
+
+        with open(file_name, 'w') as f:
+            for key, count in sorted(collapsed.items()):
+                print(f'{key} {count}', file=f)
+
+        return sum(collapsed.values())
+
+class SamplingInterpreter(Interpreter):
+    def __init__(self, plox):
+        super().__init__(plox)
+        self.stack = [None]
+        self.statement = None
+        self.sampler = Sampler(self, plox.sample_interval)
+
+    def interpret(self, statements):
+        self.sampler.start()
+
+        try:
+            super().interpret(statements)
+        finally:
+            self.sampler.stop()
+
+    def execute(self, stmt):
+        self.statement = stmt
+        if stmt: return stmt.accept(self)
+
+    def execute_block(self, statements, environment):
+        previous = self.environment
+
+        try:
+            self.environment = environment
+
+            for statement in statements:
+                self.statement = statement
+
+                if (completion := statement.accept(self)) is not None:
+                    return completion
+
+        finally:
+            self.environment = previous
+
+    def call(self, paren, function, receiver, arguments):
+        callsite = self.statement
+        self.stack.append((function, callsite))
+
+        try:
+            return super().call(paren, function, receiver, arguments)
+        finally:
+            # in this order a sample taken in between still has the right frames
+            self.statement = callsite
+            self.stack.pop()
+
+    def tail_call(self, paren, function, receiver, arguments):
+        if (completion := super().tail_call(paren, function, receiver, arguments)) is TAIL:
+            self.stack[-1] = (function, self.stack[-1][1])
+
+        return completion
@@ -4,32 +4,44 @@ from plox.types import ClassType
 from plox.types import FunctionType
 
 class Resolver:
-    __scopes = []
-    __currcl = ClassType.NONE
-    __currfn = FunctionType.NONE
-
-    def __init__(self, plox, interpreter):
+    def __init__(self, plox):
         self.plox = plox
-        self.interpreter = interpreter
+
+        self.__scopes = []
+        self.__currcl = ClassType.NONE
+        self.__currfn = FunctionType.NONE
+        self.__inloop = False
+
+    # every scope maps a name to its (slot, defined) pair, slots are
+    # handed out in declaration order and index the runtime environment.
+    # a resolved access (or local declaration) keeps its (depth, slot) in
+    # its own local field, names left at None are globals
 
     def begin_scope(self):
         self.__scopes.append({})
 
     def end_scope(self):
-        self.__scopes.pop()
+        return len(self.__scopes.pop())
 
     def declare(self, name):
         if not self.__scopes:
             return None
-        
-        if name.lexeme in self.__scopes[-1]:
-            self.plox.resolve_error(name, 'variable with this name already declared in this scope')
 
-        self.__scopes[-1][name.lexeme] = False
+        scope = self.__scopes[-1]
+
+        if name.lexeme in scope:
+            self.plox.resolve_error(name, 'variable with this name already declared in this scope'); return
+
+        scope[name.lexeme] = (len(scope), False)
 
     def define(self, name):
         if self.__scopes:
-            self.__scopes[-1][name.lexeme] = True
+            scope = self.__scopes[-1]
+            scope[name.lexeme] = (scope[name.lexeme][0], True)
+
+    def resolve_declaration(self, stmt):
+        if self.__scopes:
+            stmt.local = (0, self.__scopes[-1][stmt.name.lexeme][0])
 
     def resolve(self, *args):
         for arg in args:
@@ -38,22 +50,26 @@ class Resolver:
     def resolve_local(self, expr, name):
         for i in range(0, len(self.__scopes))[::-1]:
             if name.lexeme in self.__scopes[i]:
-                self.interpreter.resolve(expr, len(self.__scopes) - 1 - i)
+                expr.local = (len(self.__scopes) - 1 - i, self.__scopes[i][name.lexeme][0])
+                return
 
     def resolve_function(self, function, fn_type):
-        enclosing_fn = self.__currfn
-        self.__currfn = fn_type
+        enclosing_fn, enclosing_loop = self.__currfn, self.__inloop
+        self.__currfn, self.__inloop = fn_type, False
 
         self.begin_scope()
 
+        if fn_type in (FunctionType.METHOD, FunctionType.INITIALIZER):
+            self.__scopes[-1]['this'] = (0, True)
+
         for param in function.params:
             self.declare(param)
             self.define (param)
 
         self.resolve(*function.body.statements)
-        self.end_scope()
+        function.scope_size = self.end_scope()
 
-        self.__currfn = enclosing_fn
+        self.__currfn, self.__inloop = enclosing_fn, enclosing_loop
 
     def visit_literal(self, expr):
         return None
@@ -100,6 +116,12 @@ class Resolver:
         for arg in expr.arguments:
             self.resolve(arg)
 
+    def visit_invoke(self, expr):
+        self.resolve(expr.object)
+
+        for arg in expr.arguments:
+            self.resolve(arg)
+
     def visit_this(self, expr):
         if self.__currfn == ClassType.NONE:
             self.plox.resolve_error(expr.token, 'can not use "this" outside of a class')
@@ -110,24 +132,35 @@ class Resolver:
         self.resolve(stmt.expression)
 
     def visit_break_statement(self, stmt):
-        self.resolve_local(stmt, stmt.token)
+        if not self.__inloop:
+            self.plox.resolve_error(stmt.token, 'can not use "break" outside of a loop')
+
+    def visit_continue_statement(self, stmt):
+        if not self.__inloop:
+            self.plox.resolve_error(stmt.token, 'can not use "continue" outside of a loop')
 
     def visit_print_statement(self, stmt):
         self.resolve(stmt.expression)
 
     def visit_while_statement(self, stmt):
+        enclosing_loop, self.__inloop = self.__inloop, True
+
         self.resolve(stmt.condition)
         self.resolve(stmt.statement)
+        self.resolve(stmt.increment)
+
+        self.__inloop = enclosing_loop
 
     def visit_block_statement(self, stmt):
         self.begin_scope()
         self.resolve(*stmt.statements)
-        self.end_scope()
+        stmt.scope_size = self.end_scope()
 
     def visit_var_statement(self, stmt):
         self.declare(stmt.name)
         self.resolve(stmt.initializer)
         self.define (stmt.name)
+        self.resolve_declaration(stmt)
 
     def visit_if_statement(self, stmt):
         self.resolve(stmt.condition)
@@ -137,10 +170,11 @@ class Resolver:
     def visit_function_statement(self, stmt):
         self.declare(stmt.name)
         self.define (stmt.name)
+        self.resolve_declaration(stmt)
         self.resolve_function(stmt, FunctionType.FUNCTION)
 
-    def visit_variable(self, expr):        
-        if self.__scopes and (self.__scopes[-1].get(expr.name.lexeme, None) == False):
+    def visit_variable(self, expr):
+        if self.__scopes and (self.__scopes[-1].get(expr.name.lexeme, (0, True))[1] == False):
             self.plox.resolve_error(expr.name, 'can not read local variable in it\'s own initializer')
 
         self.resolve_local(expr, expr.name)
@@ -160,6 +194,7 @@ class Resolver:
 
         self.declare(stmt.name)
         self.define (stmt.name)
+        self.resolve_declaration(stmt)
 
         if stmt.superclass and stmt.name.lexeme == stmt.superclass.name.lexeme:
             self.plox.resolve_error(stmt.superclass.name, 'a class can not inherit from itself')
@@ -169,10 +204,7 @@ class Resolver:
 
             self.resolve(stmt.superclass)
             self.begin_scope()
-            self.__scopes[-1]['super'] = True
-
-        self.begin_scope()
-        self.__scopes[-1]['this'] = True
+            self.__scopes[-1]['super'] = (0, True)
 
         for method in stmt.methods:
             self.resolve_function(
@@ -180,7 +212,6 @@ class Resolver:
                 FunctionType.INITIALIZER if method.name.lexeme == 'init' else FunctionType.METHOD
             )
 
-        self.end_scope()
         self.__currcl = ClassType.NONE
 
         if stmt.superclass:
@@ -0,0 +1,63 @@
+# coding: utf-8
+
+from plox.error import RuntimeError
+
+# with --ropes a "+" that yields a long string yields a Rope instead: the
+# pieces are kept in a list and joined the first time the text is needed
+# (printing, comparing, hashing). a rope extended at its end appends to the
+# list it shares with the rope it came from unless that list has grown past
+# it since, so s = s + line in a loop is linear instead of quadratic.
+
+ROPE_MIN = 512
+
+class Rope:
+    __slots__ = ('parts', 'count', 'length', 'text')
+
+    def __init__(self, parts, length):
+        self.parts = parts
+        self.count = len(parts)
+        self.length = length
+        self.text = None
+
+    def __str__(self):
+        if self.text is None:
+            self.text = ''.join(self.parts[:self.count])
+
+        return self.text
+
+    def __len__(self):
+        return self.length
+
+    def __eq__(self, other):
+        return str(self) == (str(other) if other.__class__ is Rope else other)
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __add__(self, other):
+        if other.__class__ is Rope:
+            pieces = other.parts[:other.count]
+        else:
+            pieces = [other if other.__class__ is str else str(other)]
+
+        parts = self.parts if self.count == len(self.parts) else self.parts[:self.count]
+        parts += pieces
+
+        return Rope(parts, self.length + sum(map(len, pieces)))
+
+    def __radd__(self, other):
+        other = other if other.__class__ is str else str(other)
+        return Rope([other, *self.parts[:self.count]], len(other) + self.length)
+
+def concat(operator, left, right):
+    if left.__class__ is Rope or right.__class__ is Rope:
+        return left + right
+
+    if left.__class__ is str or right.__class__ is str:
+        text = f'{left}{right}'
+        return text if len(text) < ROPE_MIN else Rope([text], len(text))
+
+    try:
+        return left + right
+    except TypeError:
+        raise RuntimeError(operator, 'operands must be numbers or strings')
@@ -1,90 +1,128 @@
 # coding: utf-8
 
 class Statement:
-    pass
+    __slots__ = ()
 
 class PrintStatement(Statement):
+    __slots__ = ('expression',)
+
     def __init__(self, expr):
         self.expression = expr
 
     def accept(self, visitor):
-        visitor.visit_print_statement(self)
+        return visitor.visit_print_statement(self)
 
 class ExpressionStatement(Statement):
+    __slots__ = ('expression',)
+
     def __init__(self, expr):
         self.expression = expr
 
     def accept(self, visitor):
-        visitor.visit_expression_statement(self)
+        return visitor.visit_expression_statement(self)
 
 class BreakStatement(Statement):
+    __slots__ = ('token',)
+
     def __init__(self, token):
         self.token = token
 
     def accept(self, visitor):
-        visitor.visit_break_statement(self)
+        return visitor.visit_break_statement(self)
 
 class ContinueStatement(Statement):
+    __slots__ = ('token',)
+
     def __init__(self, token):
         self.token = token
 
     def accept(self, visitor):
-        visitor.visit_continue_statement(self)
+        return visitor.visit_continue_statement(self)
 
 class BlockStatement(Statement):
+    __slots__ = ('statements', 'scope_size')
+
     def __init__(self, statements):
         self.statements = statements
+        self.scope_size = 0
 
     def accept(self, visitor):
-        visitor.visit_block_statement(self)
+        return visitor.visit_block_statement(self)
 
 class ReturnStatement(Statement):
+    __slots__ = ('value', 'token')
+
     def __init__(self, token, value):
         self.value = value
         self.token = token
 
     def accept(self, visitor):
-        visitor.visit_return_statement(self)
+        return visitor.visit_return_statement(self)
 
 class WhileStatement(Statement):
-    def __init__(self, condition, statement):
+    __slots__ = ('condition', 'statement', 'increment')
+
+    def __init__(self, condition, statement, increment=None):
         self.condition = condition
         self.statement = statement
+        self.increment = increment
 
     def accept(self, visitor):
-        visitor.visit_while_statement(self)
+        return visitor.visit_while_statement(self)
 
 class VarStatement(Statement):
+    __slots__ = ('name', 'initializer', 'local')
+
     def __init__(self, name, expr):
         self.name = name
         self.initializer = expr
+        self.local = None
 
     def accept(self, visitor):
-        visitor.visit_var_statement(self)
+        return visitor.visit_var_statement(self)
 
 class ClassStatement(Statement):
+    __slots__ = ('name', 'methods', 'superclass', 'local')
+
     def __init__(self, name, methods, superclass):
         self.name = name
         self.methods = methods
         self.superclass = superclass
+        self.local = None
 
     def accept(self, visitor):
-        visitor.visit_class_statement(self)
+        return visitor.visit_class_statement(self)
 
 class FunctionStatement(Statement):
+    __slots__ = ('name', 'body', 'params', 'compiled', 'chunk', 'scope_size', 'local')
+
     def __init__(self, name, params, body):
         self.name = name
         self.body = body
         self.params = params
+        self.compiled = None
+        self.chunk = None
+        self.scope_size = 0
+        self.local = None
+
+    def __getstate__(self):
+        # code compiled by the closure and vm engines stays behind, the
+        # engine that unpickles the statement compiles it again
+        return None, {
+            'name': self.name, 'body': self.body, 'params': self.params,
+            'compiled': None, 'chunk': None, 'scope_size': self.scope_size, 'local': self.local
+        }
 
     def accept(self, visitor):
-        visitor.visit_function_statement(self)
+        return visitor.visit_function_statement(self)
 
 class IfStatement(Statement):
+    __slots__ = ('condition', 'then_branch', 'else_branch')
+
     def __init__(self, condition, then_branch, else_branch):
         self.condition = condition
         self.then_branch = then_branch
         self.else_branch = else_branch
 
     def accept(self, visitor):
-        visitor.visit_if_statement(self)
\ No newline at end of file
+        return visitor.visit_if_statement(self)
\ No newline at end of file
@@ -0,0 +1,194 @@
+# coding: utf-8
+
+import time
+import asyncio
+
+from plox.error import RuntimeError
+
+# natives that have to wait (sleep, input, join, an empty channel) hand a
+# Wait to interpreter.wait. the vm runs lox code as a generator and yields
+# it to the event loop, so any number of tasks can be waiting at once on a
+# single thread. the tree and closure engines (and lox code the vm runs on
+# behalf of a native, memo for example) can not leave the python stack they
+# are on and block in place instead.
+
+def settle(future, source):
+    if future.done():
+        return
+
+    if source.cancelled():
+        future.cancel()
+
+    elif source.exception() is not None:
+        future.set_exception(source.exception())
+
+    else:
+        future.set_result(source.result())
+
+def number_or_string(value):
+    try   : return float(value)
+    except: return value
+
+# a wait has two methods: block() waits in place and returns the value (the
+# tree and closure engines call it), attach(future) settles the future with
+# the value on the running event loop (the scheduler calls it). the base
+# class is only what natives and engines check for, an abc would make that
+# isinstance check on every native call several times slower.
+
+class Wait:
+    # waits on other tasks, it never ends if they are all waiting too
+    on_tasks = False
+
+    def ready(self):
+        return False
+
+class Delay(Wait):
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def block(self):
+        time.sleep(self.seconds)
+
+    def attach(self, future):
+        asyncio.get_running_loop().call_later(self.seconds, lambda: future.done() or future.set_result(None))
+
+class ReadLine(Wait):
+    def __init__(self, prompt):
+        self.prompt = prompt
+
+    def block(self):
+        return number_or_string(input(self.prompt))
+
+    def attach(self, future):
+        # stdin can not be polled portably, the line is read on the loop's
+        # executor while the other tasks go on
+        line = asyncio.get_running_loop().run_in_executor(None, self.block)
+        line.add_done_callback(lambda line: settle(future, line))
+
+class Join(Wait):
+    on_tasks = True
+
+    def __init__(self, task):
+        self.task = task
+
+    def block(self):
+        if self.task.handle is None or not self.task.handle.done():
+            raise RuntimeError(None, 'can not wait for a task here')
+
+        return self.task.handle.result()
+
+    def ready(self):
+        return self.task.handle.done()
+
+    def attach(self, future):
+        self.task.handle.add_done_callback(lambda handle: settle(future, handle))
+
+class Receive(Wait):
+    on_tasks = True
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def block(self):
+        raise RuntimeError(None, 'can not wait on an empty channel here')
+
+    def attach(self, future):
+        self.channel.waiters.append(future)
+
+class Scheduler:
+    def __init__(self):
+        self.tasks = []
+        self.live = 0
+        self.waiting = {}
+        self.running = False
+
+    def spawn(self, task):
+        self.tasks.append(task)
+
+        # tasks spawned before the loop runs start with it
+        if self.running:
+            task.handle = self.start(task.frames)
+
+    def start(self, frames, request=None):
+        self.live += 1
+
+        handle = asyncio.ensure_future(self.drive(frames, request))
+        handle.add_done_callback(self.finished)
+
+        return handle
+
+    def finished(self, handle):
+        self.live -= 1
+        self.check()
+
+        # main raises the first error, the others (a joiner failing with
+        # the task it joined) are dropped
+        handle.cancelled() or handle.exception()
+
+    async def drive(self, frames, request):
+        send, value = frames.send, None
+
+        while True:
+            if request is not None:
+                # errors of the wait are raised where it was called
+                try:
+                    send, value = frames.send, await self.wait(request)
+                except RuntimeError as error:
+                    send, value = frames.throw, error
+
+            try:
+                request = send(value)
+            except StopIteration as stop:
+                return stop.value
+
+    async def wait(self, request):
+        future = asyncio.get_running_loop().create_future()
+        request.attach(future)
+
+        if request.on_tasks:
+            self.waiting[future] = request
+            self.check()
+
+        try:
+            return await future
+        finally:
+            self.waiting.pop(future, None)
+
+    def check(self):
+        waiting = [future for future, request in self.waiting.items() if not (future.done() or request.ready())]
+
+        if waiting and len(waiting) == self.live:
+            waiting[0].set_exception(RuntimeError(None, 'deadlock, every task is waiting on a channel or a task'))
+
+    def run(self, frames, request):
+        try:
+            asyncio.run(self.main(frames, request))
+        finally:
+            self.tasks = []
+            self.live = 0
+            self.waiting = {}
+
+    async def main(self, frames, request):
+        self.running = True
+
+        try:
+            for task in self.tasks:
+                task.handle = self.start(task.frames)
+
+            handles = {self.start(frames, request)} if frames else set()
+
+            # the program ends once the main script and every task spawned
+            # on the way are done, the first runtime error ends it early
+            while handles := {handle for handle in handles | {task.handle for task in self.tasks} if not handle.done()}:
+                done, _ = await asyncio.wait(handles, return_when=asyncio.FIRST_EXCEPTION)
+
+                # a task that fails fails whoever joins it too, only the
+                # first error is raised (and so reported)
+                errors = [handle.exception() for handle in done if handle.exception() is not None]
+
+                if errors:
+                    raise errors[0]
+
+                self.tasks = [task for task in self.tasks if not task.handle.done()]
+        finally:
+            self.running = False
@@ -1,6 +1,8 @@
 # coding: utf-8
 
 class Token:
+    __slots__ = ('line', 'type', 'lexeme', 'literal')
+
     def __init__(self, type, lexeme, literal, line):
         self.line = line
         self.type = type
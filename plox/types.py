@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 ClassType = Enum(
     'ClassType',
@@ -19,6 +19,16 @@ FunctionType = Enum(
     '''
 )
 
+Completion = Enum(
+    'Completion',
+    '''
+        BREAK
+        CONTINUE
+        RETURN
+        TAIL
+    '''
+)
+
 TokenType = Enum(
     'TokenType', 
     '''
@@ -33,4 +43,22 @@ TokenType = Enum(
         EOF IF CLASS ELSE TRUE BREAK FUN FOR AND OR VAR
         CONTINUE SUPER PRINT FALSE RETURN NIL WHILE THIS
     '''
-)
\ No newline at end of file
+)
+
+OpCode = IntEnum(
+    'OpCode',
+    '''
+        GET_LOCAL SET_LOCAL GET_GLOBAL SET_GLOBAL DEFINE
+        CONSTANT NIL TRUE FALSE POP
+
+        ADD SUBTRACT MULTIPLY DIVIDE NEGATE NOT
+        EQUAL NOT_EQUAL LESS LESS_EQUAL GREATER GREATER_EQUAL
+
+        JUMP JUMP_IF_FALSE JUMP_IF_TRUE_OR_POP JUMP_IF_FALSE_OR_POP LOOP
+        PUSH_SCOPE POP_SCOPE
+
+        CALL RETURN CLOSURE CLASS PRINT
+        GET_PROPERTY SET_PROPERTY GET_SUPER GET_METHOD INVOKE
+        CONCAT
+    '''
+)
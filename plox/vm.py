@@ -0,0 +1,458 @@
+# coding: utf-8
+
+from plox.types import OpCode
+from plox.compiler import Compiler
+from plox.environment import Environment, GlobalEnvironment
+from plox.interpreter import stringify
+from plox.operators import NUMBERS, check_number_operands
+from plox.rope import concat
+from plox.tasks import Wait, Scheduler
+
+from plox.error import RuntimeError
+
+from plox.callable import (
+    LoxClass,
+    LoxInstance,
+    LoxCallable,
+    LoxFunction
+)
+
+(
+    GET_LOCAL, SET_LOCAL, GET_GLOBAL, SET_GLOBAL, DEFINE,
+    CONSTANT, NIL, TRUE, FALSE, POP,
+
+    ADD, SUBTRACT, MULTIPLY, DIVIDE, NEGATE, NOT,
+    EQUAL, NOT_EQUAL, LESS, LESS_EQUAL, GREATER, GREATER_EQUAL,
+
+    JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE_OR_POP, JUMP_IF_FALSE_OR_POP, LOOP,
+    PUSH_SCOPE, POP_SCOPE,
+
+    CALL, RETURN, CLOSURE, CLASS, PRINT,
+    GET_PROPERTY, SET_PROPERTY, GET_SUPER, GET_METHOD, INVOKE,
+    CONCAT
+) = map(int, OpCode)
+
+class VMFunction(LoxFunction):
+    def invoke(self, interpreter, receiver, arguments):
+        return interpreter.run(
+            self.declaration.chunk,
+            self.frame(receiver, arguments),
+            receiver if self.initializer else None
+        )
+
+class VM:
+    def __init__(self, plox):
+        self.plox = plox
+        self.globals = GlobalEnvironment()
+        self.scheduler = Scheduler()
+        self.stdout = None
+
+        # frames of the lox code waiting on a native that runs lox code
+        # again (memo for example), the new frames count on top of them
+        self.depth = 0
+
+    def interpret(self, statements):
+        chunk = Compiler(self.plox).compile(statements)
+        self.depth = 0
+
+        if self.plox.error_occured:
+            return
+
+        frames = self.execute(chunk, self.globals)
+
+        try:
+            # the script runs on its own until it first waits or ends with
+            # tasks spawned, the event loop takes over from there
+            try:
+                request = next(frames)
+            except StopIteration:
+                frames = request = None
+
+            if frames or self.scheduler.tasks:
+                self.scheduler.run(frames, request)
+
+        except RuntimeError as error:
+            self.plox.runtime_error(error)
+
+    def wait(self, request):
+        return request
+
+    def task(self, function):
+        return self.execute(
+            function.declaration.chunk,
+            function.frame(function.receiver, []),
+            function.receiver if function.initializer else None
+        )
+
+    def run(self, chunk, env, receiver=None):
+        # lox code called from a native runs to the end right there
+        frames = self.execute(chunk, env, receiver)
+        value = None
+
+        while True:
+            try:
+                request = frames.send(value)
+            except StopIteration as stop:
+                return stop.value
+
+            value = request.block()
+
+    def execute(self, chunk, env, receiver=None):
+        ip = 0
+        code = chunk.code
+        constants = chunk.constants
+
+        stack  = []
+        frames = []
+
+        pop  = stack.pop
+        push = stack.append
+
+        outer = self.depth
+        max_depth = self.plox.max_depth - outer
+
+        if max_depth <= 0:
+            raise RuntimeError(None, 'stack overflow')
+
+        while True:
+            op  = code[ip]
+            arg = code[ip + 1]
+            ip += 2
+
+            if op == GET_LOCAL:
+                distance, slot = constants[arg]
+                scope = env
+
+                for _ in range(distance):
+                    scope = scope.enclosing
+
+                push(scope.values[slot])
+
+            elif op == GET_GLOBAL:
+                push(self.globals.get(constants[arg]))
+
+            elif op == CONSTANT:
+                push(constants[arg])
+
+            elif op == SET_LOCAL:
+                distance, slot = constants[arg]
+                scope = env
+
+                for _ in range(distance):
+                    scope = scope.enclosing
+
+                scope.values[slot] = stack[-1]
+
+            elif op == POP:
+                pop()
+
+            elif op == JUMP_IF_FALSE:
+                if not pop():
+                    ip = arg
+
+            elif op == LOOP or op == JUMP:
+                ip = arg
+
+            elif op == ADD:
+                right = pop()
+                left  = stack[-1]
+
+                if left.__class__ is str or right.__class__ is str:
+                    stack[-1] = f'{left}{right}'
+                else:
+                    try:
+                        stack[-1] = left + right
+                    except TypeError:
+                        raise RuntimeError(constants[arg], 'operands must be numbers or strings')
+
+            elif op == SUBTRACT:
+                right = pop()
+                left  = stack[-1]
+
+                if left.__class__ not in NUMBERS or right.__class__ not in NUMBERS:
+                    check_number_operands(constants[arg], left, right)
+
+                stack[-1] = left - right
+
+            elif op == LESS:
+                right = pop()
+                left  = stack[-1]
+
+                if left.__class__ not in NUMBERS or right.__class__ not in NUMBERS:
+                    check_number_operands(constants[arg], left, right)
+
+                stack[-1] = left < right
+
+            elif op == CALL or op == INVOKE:
+                argc, paren = constants[arg]
+
+                # INVOKE has the receiver left by GET_METHOD between the callee
+                # and the arguments, it is None when the callee was not a method
+                this = stack.pop(-argc - 1) if op == INVOKE else None
+                callee = stack[-argc - 1]
+
+                if this is None:
+                    if callee.__class__ is LoxClass:
+                        this = LoxInstance(callee)
+
+                        if callee.initializer is None:
+                            if argc != 0:
+                                raise RuntimeError(paren, f'expected 0 arguments but got {argc}')
+
+                            stack[-1] = this; continue
+
+                        callee = callee.initializer
+
+                    elif callee.__class__ is VMFunction:
+                        this = callee.receiver
+
+                if callee.__class__ is VMFunction:
+                    params = callee.declaration.params
+
+                    if argc != len(params):
+                        raise RuntimeError(paren, f'expected {len(params)} arguments but got {argc}')
+
+                    environment = Environment(callee.closure, callee.declaration.scope_size)
+
+                    if this is None:
+                        if argc:
+                            environment.values[:argc] = stack[-argc:]
+                    else:
+                        environment.values[0] = this
+
+                        if argc:
+                            environment.values[1:argc + 1] = stack[-argc:]
+
+                    del stack[-argc - 1:]
+
+                    # a call right before RETURN replaces the running frame
+                    # unless that frame still has to return its receiver
+                    if code[ip] != RETURN or receiver is not None:
+                        if len(frames) == max_depth:
+                            raise RuntimeError(paren, 'stack overflow')
+
+                        frames.append((code, constants, ip, env, receiver))
+
+                    chunk = callee.declaration.chunk
+                    code, constants, ip, env = chunk.code, chunk.constants, 0, environment
+                    receiver = this if callee.initializer else None
+
+                elif isinstance(callee, LoxCallable):
+                    if argc != callee.arity():
+                        raise RuntimeError(paren, f'expected {callee.arity()} arguments but got {argc}')
+
+                    arguments = stack[-argc:] if argc else []
+                    del stack[-argc - 1:]
+
+                    self.depth = outer + len(frames) + 1
+
+                    try:
+                        value = callee.call(self, arguments)
+
+                        # the task waits here, the loop sends the value back
+                        if isinstance(value, Wait):
+                            self.depth = outer
+                            value = yield value
+
+                    except RecursionError:
+                        raise RuntimeError(paren, 'stack overflow')
+
+                    except RuntimeError as error:
+                        if error.token is None:
+                            error.token = paren
+
+                        raise
+
+                    finally:
+                        self.depth = outer
+
+                    push(value)
+
+                else:
+                    raise RuntimeError(paren, 'can only call functions and classes')
+
+            elif op == RETURN:
+                value = pop()
+
+                if receiver is not None:
+                    value = receiver
+
+                if not frames:
+                    return value
+
+                code, constants, ip, env, receiver = frames.pop()
+                push(value)
+
+            elif op == GET_PROPERTY:
+                object = pop()
+
+                if not isinstance(object, LoxInstance):
+                    raise RuntimeError(constants[arg], 'only instances have properties')
+
+                push(object.get(constants[arg]))
+
+            elif op == GET_METHOD:
+                object = stack[-1]
+                name = constants[arg]
+
+                if object.__class__ is LoxInstance and name.lexeme not in object.fields:
+                    if (method := object.lclass.methods.get(name.lexeme)) is not None:
+                        stack[-1] = method
+                        push(object); continue
+
+                if not isinstance(object, LoxInstance):
+                    raise RuntimeError(name, 'only instances have properties')
+
+                stack[-1] = object.get(name)
+                push(None)
+
+            elif op == SET_PROPERTY:
+                value  = pop()
+                object = pop()
+
+                if not isinstance(object, LoxInstance):
+                    raise RuntimeError(constants[arg], 'only instances have fields')
+
+                object.set(constants[arg], value)
+                push(value)
+
+            elif op == PUSH_SCOPE:
+                env = Environment(env, arg)
+
+            elif op == POP_SCOPE:
+                env = env.enclosing
+
+            elif op == DEFINE:
+                env.values[constants[arg]] = pop()
+
+            elif op == SET_GLOBAL:
+                self.globals.assign(constants[arg], stack[-1])
+
+            elif op == NIL:
+                push(None)
+
+            elif op == TRUE:
+                push(True)
+
+            elif op == FALSE:
+                push(False)
+
+            elif op == MULTIPLY:
+                right = pop()
+                left  = stack[-1]
+
+                if left.__class__ not in NUMBERS or right.__class__ not in NUMBERS:
+                    check_number_operands(constants[arg], left, right)
+
+                stack[-1] = left * right
+
+            elif op == DIVIDE:
+                right = pop()
+                left  = stack[-1]
+
+                if left.__class__ not in NUMBERS or right.__class__ not in NUMBERS:
+                    check_number_operands(constants[arg], left, right)
+
+                stack[-1] = left / right
+
+            elif op == GREATER:
+                right = pop()
+                left  = stack[-1]
+
+                if left.__class__ not in NUMBERS or right.__class__ not in NUMBERS:
+                    check_number_operands(constants[arg], left, right)
+
+                stack[-1] = left > right
+
+            elif op == LESS_EQUAL:
+                right = pop()
+                left  = stack[-1]
+
+                if left.__class__ not in NUMBERS or right.__class__ not in NUMBERS:
+                    check_number_operands(constants[arg], left, right)
+
+                stack[-1] = left <= right
+
+            elif op == GREATER_EQUAL:
+                right = pop()
+                left  = stack[-1]
+
+                if left.__class__ not in NUMBERS or right.__class__ not in NUMBERS:
+                    check_number_operands(constants[arg], left, right)
+
+                stack[-1] = left >= right
+
+            elif op == EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] == right
+
+            elif op == NOT_EQUAL:
+                right = pop()
+                stack[-1] = not (stack[-1] == right)
+
+            elif op == NEGATE:
+                value = stack[-1]
+
+                if value.__class__ not in NUMBERS:
+                    check_number_operands(constants[arg], value)
+
+                stack[-1] = -1 * value
+
+            elif op == NOT:
+                stack[-1] = not stack[-1]
+
+            elif op == JUMP_IF_TRUE_OR_POP:
+                if stack[-1]:
+                    ip = arg
+                else:
+                    pop()
+
+            elif op == JUMP_IF_FALSE_OR_POP:
+                if not stack[-1]:
+                    ip = arg
+                else:
+                    pop()
+
+            elif op == PRINT:
+                print(stringify(pop()), file=self.stdout)
+
+            elif op == CLOSURE:
+                push(VMFunction(constants[arg], env))
+
+            elif op == GET_SUPER:
+                distance, method = constants[arg]
+
+                superclass = env.get_at(distance, 0)
+                object     = env.get_at(distance - 1, 0)
+
+                if not (function := superclass.find_method(method.lexeme)):
+                    raise RuntimeError(method, f'undefined method "{method.lexeme}"')
+
+                push(function.bind(object))
+
+            elif op == CLASS:
+                stmt, key = constants[arg]
+                superclass = None
+                methods_env = env
+
+                if stmt.superclass:
+                    if not isinstance(superclass := pop(), LoxClass):
+                        raise RuntimeError(stmt.superclass.name, 'superclass must be a class')
+
+                    methods_env = Environment(env, 1)
+                    methods_env.define(0, superclass)
+
+                methods = {}
+
+                for method in stmt.methods:
+                    methods[method.name.lexeme] = VMFunction(
+                        method,
+                        methods_env,
+                        method.name.lexeme == 'init'
+                    )
+
+                env.define(key, LoxClass(stmt.name.lexeme, methods, superclass))
+
+            elif op == CONCAT: # ADD with --ropes
+                right = pop()
+                stack[-1] = concat(constants[arg], stack[-1], right)
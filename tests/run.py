@@ -0,0 +1,180 @@
+# coding: utf-8
+
+# usage: python tests/run.py [--engines tree,vm,closure] [file.lox ...]
+#
+# runs every program in tests/ on each engine, with and without the ast
+# optimizer, and compares what it prints with its "// expect: " comments
+# (in order), what it reports on stderr with its "// expect error: "
+# comments (nothing by default) and its exit status with "// expect exit: N"
+# (0 by default).
+# "// engines: vm" limits a program to the engines listed and "// flags: ..."
+# passes more flags to each of its runs. the runs without --O0 or --ropes
+# share one program cache, the first engine to run a program stores it and
+# the others load it. the programs without "// flags:" are then run once
+# more per engine through "plox batch", two at a time, and the cache limit
+# is checked last.
+
+import os
+import re
+import sys
+import json
+import glob
+import argparse
+import tempfile
+import subprocess
+
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def expectations(source):
+    output = re.findall(r'// expect: ?(.*)', source)
+    errors = re.findall(r'// expect error: (.*)', source)
+    status = re.search(r'// expect exit: (\d+)', source)
+    engines = re.search(r'// engines: ([\w,]+)', source)
+    flags = re.search(r'// flags: (.*)', source)
+
+    return (output, errors, int(status[1]) if status else 0,
+            engines[1].split(',') if engines else None, flags[1].split() if flags else [])
+
+def error_lines(stderr):
+    # errors without a location print a backspace over the blank before it
+    return stderr.replace(' \b', '').splitlines()
+
+def compare(output, stderr, returncode, expected, errors, status):
+    if output.splitlines() != expected:
+        return f'printed {output.splitlines()}, expected {expected}\n{stderr[-2000:]}'
+
+    if error_lines(stderr) != errors:
+        return f'reported {error_lines(stderr)[-20:]}, expected {errors}'
+
+    if returncode != status:
+        return f'exited with {returncode}, expected {status}\n{stderr[-2000:]}'
+
+def plox(*args, env=None, timeout=60):
+    return subprocess.run([sys.executable, '-m', 'plox', *args], cwd=ROOT, env=env and {**os.environ, **env},
+                          capture_output=True, text=True, timeout=timeout)
+
+def cache_stats(stderr):
+    lines = stderr.splitlines(keepends=True)
+
+    if not lines or not lines[-1].startswith('cache: '):
+        return None, stderr
+
+    return lines[-1].split(' (')[0], ''.join(lines[:-1])
+
+# with a cache directory the program runs with --cache-stats, it should be
+# loaded from the cache when stored is set. programs that fail to compile
+# are never stored.
+def check(path, engine, flags, cache=None, stored=False):
+    expected, errors, status, engines, more = expectations(Path(path).read_text())
+
+    if engines and engine not in engines:
+        return None
+
+    try:
+        if cache is None:
+            result = plox('--no-cache', '--engine', engine, *flags, *more, path)
+        else:
+            result = plox('--cache-stats', '--engine', engine, *flags, *more, path, env={'PLOX_CACHE_DIR': cache})
+    except subprocess.TimeoutExpired:
+        return 'timed out'
+
+    stderr = result.stderr
+
+    if cache is not None:
+        stats, stderr = cache_stats(stderr)
+        wanted = 'cache: 1 hits, 0 misses' if stored and status != 65 else 'cache: 0 hits, 1 misses'
+
+        if stats != wanted:
+            return f'reported {stats!r}, expected {wanted!r}'
+
+    return compare(result.stdout, stderr, result.returncode, expected, errors, status)
+
+# batch takes no flags of its own
+def batched(path, engine):
+    _, _, _, engines, flags = expectations(Path(path).read_text())
+    return not flags and (engines is None or engine in engines)
+
+def check_batch(paths, engine):
+    with tempfile.TemporaryDirectory() as directory:
+        report = Path(directory) / 'report.json'
+
+        try:
+            plox('batch', '-j', '2', '--no-cache', '--engine', engine, '--json', str(report), *paths, timeout=120)
+        except subprocess.TimeoutExpired:
+            return {path: 'batch timed out' for path in paths}
+
+        scripts = json.loads(report.read_text())['scripts'] if report.exists() else []
+
+    errors = {path: 'batch wrote no report' for path in paths}
+
+    for script in scripts:
+        if (error := compare(script['stdout'], script['stderr'], script['status'], *expectations(Path(script['path']).read_text())[:3])):
+            errors[script['path']] = error
+        else:
+            del errors[script['path']]
+
+    return errors
+
+# an entry bigger than the limit is not stored, and storing one evicts the
+# least recently used entries until the directory fits the limit again
+def cached(path, limit):
+    with tempfile.TemporaryDirectory() as directory:
+        plox(path, env={'PLOX_CACHE_DIR': directory, 'PLOX_CACHE_SIZE': str(limit)})
+        return [entry.stat().st_size for entry in Path(directory).glob('*.loxc')]
+
+def check_cache_limit():
+    first, second = str(ROOT / 'tests' / 'classes.lox'), str(ROOT / 'tests' / 'closures.lox')
+
+    if cached(first, 1):
+        return f'stored {Path(first).name} past a limit of 1 byte'
+
+    [size], [other] = cached(first, 2**30), cached(second, 2**30)
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = {'PLOX_CACHE_DIR': directory, 'PLOX_CACHE_SIZE': str(size + other - 1)}
+
+        for path in (first, second):
+            plox(path, env=env)
+
+        if (sizes := [entry.stat().st_size for entry in Path(directory).glob('*.loxc')]) != [other]:
+            return f'kept entries of {sizes} bytes, expected only the {other} of {Path(second).name}'
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument('files', nargs='*')
+    argparser.add_argument('--engines', default='tree,vm,closure')
+
+    args = argparser.parse_args()
+    files = [str(Path(path).resolve()) for path in args.files] or sorted(glob.glob(str(ROOT / 'tests' / '*.lox')))
+    failed = 0
+
+    with tempfile.TemporaryDirectory() as cache:
+        for path in files:
+            engines, stored = expectations(Path(path).read_text())[3], False
+
+            for engine in args.engines.split(','):
+                for flags in ([], ['--O0'], ['--ropes']):
+                    if (error := check(path, engine, flags, None if flags else cache, stored)):
+                        failed += 1
+                        print(f'FAIL {Path(path).name} --engine={engine} {" ".join(flags)}: {error}')
+
+                stored = stored or engines is None or engine in engines
+
+    for engine in args.engines.split(','):
+        paths = [path for path in files if batched(path, engine)]
+
+        for path, error in check_batch(paths, engine).items():
+            failed += 1
+            print(f'FAIL {Path(path).name} --engine={engine} batch: {error}')
+
+    if (error := check_cache_limit()):
+        failed += 1
+        print(f'FAIL cache limit: {error}')
+
+    print(f'{len(files)} programs, {failed} failures')
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()